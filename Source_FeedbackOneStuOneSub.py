@@ -1,6 +1,1410 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
+import argparse
+import csv
+import hashlib
+import json
+import os
+import queue
 import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import shared_memory
+import numpy as np
+
+
+class TopicUnionFind:
+    """Array-backed disjoint-set forest over integer topic ids"""
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+
+    def find(self, node):
+        # Path halving keeps the trees flat without recursion
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        root_a = self.find(a)
+        root_b = self.find(b)
+        if root_a == root_b:
+            return root_a
+
+        # Union by size so find() stays near-constant amortized
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        return root_a
+
+
+# One packed record per post pair: 31 bytes instead of a dict of strings
+CORRELATION_DTYPE = np.dtype([
+    ("post1", np.int32),
+    ("post2", np.int32),
+    ("student", np.int32),
+    ("subject", np.int32),
+    ("topic", np.int32),
+    ("correlation", np.float32),
+    ("time_gap", np.int16),
+    ("status", np.int8),
+    ("p_value", np.float32)
+])
+
+
+# Streaming loader settings
+LOAD_CHUNK_SIZE = 2000
+FIRST_CHUNK_SIZE = 200
+LOAD_POLL_MS = 50
+LOAD_TICK_SECONDS = 0.03
+
+# Significance test settings
+PERMUTATIONS = 2000
+SIGNIFICANCE_ALPHA = 0.05
+SIGNIFICANCE_BATCH = 4000000
+
+# Correlation table settings: only TREE_ROWS items exist in the Treeview
+TREE_ROWS = 15
+SORT_FIELDS = {"Post1_ID": "post1", "Post2_ID": "post2", "Student": "student", "Subject": "subject",
+               "Topics": "topic", "Correlation": "correlation", "Time Gap": "time_gap",
+               "Status": "status", "P-Value": "p_value"}
+
+# Statistics tab settings
+HISTOGRAM_BINS = 10
+ORDER_SCAN_BLOCK = 4096
+
+ROW_FIELDS = ("Post1_ID", "Post2_ID", "Student", "Subject", "Topics", "Correlation", "Time_Gap")
+POST_FIELDS = ("Post_ID", "Student", "Subject", "Topic", "Day", "Text")
+POST_ID_PATTERN = re.compile(r"P(\d+)", re.IGNORECASE)
+
+
+def parse_time_gap(value):
+    """Convert a Time_Gap value such as '3 days' into an integer day count"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(str(value).split()[0])
+
+
+def parse_post_day(value):
+    """Day number of a post: an integer day index or an ISO date"""
+    text = str(value).strip()
+    if text.lstrip("-").isdigit():
+        return int(text)
+    return date.fromisoformat(text).toordinal()
+
+
+def parse_post_id(value):
+    """
+    Convert a post id such as 'P004' into its integer number.
+
+    The number is the post's identity ('P4' and 'P004' are the same post), so
+    anything but 'P' followed by digits, or a number that does not fit the int32
+    post columns, raises ValueError rather than being merged with another post.
+    """
+    if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        number = int(value)
+    else:
+        match = POST_ID_PATTERN.fullmatch(str(value).strip())
+        if match is None:
+            raise ValueError(f"invalid post id {value!r}, expected P followed by digits")
+        number = int(match.group(1))
+    if not 0 <= number <= np.iinfo(np.int32).max:
+        raise ValueError(f"post id {value!r} is out of range")
+    return number
+
+
+def format_post_id(value):
+    return f"P{int(value):03d}"
+
+
+# Parser and storage type of every numeric field; all other fields are labels
+FIELD_PARSERS = {"Post1_ID": (parse_post_id, np.int32), "Post2_ID": (parse_post_id, np.int32),
+                 "Post_ID": (parse_post_id, np.int32), "Correlation": (float, np.float32),
+                 "P_Value": (float, np.float32), "Time_Gap": (parse_time_gap, np.int16),
+                 "Day": (parse_post_day, np.int32)}
+OPTIONAL_FIELDS = ("Status", "P_Value")
+
+
+def split_topics(topics):
+    """Split a 'Topic A - Topic B' label into its two topic names"""
+    parts = [part.strip() for part in topics.split(" - ", 1)]
+    return [part for part in parts if part]
+
+
+def normalize_row(row, fields=ROW_FIELDS):
+    """
+    Map a CSV/JSONL record onto the sample-data keys, accepting Treeview heading names.
+
+    The given fields (and optional ones that are present) are validated and
+    converted: numbers are parsed and range-checked, labels become strings.
+    Raises ValueError naming the field for anything that cannot be stored.
+    """
+    if not isinstance(row, dict):
+        raise ValueError(f"expected a record with named fields, got {type(row).__name__}")
+    normalized = {str(key).strip().replace(" ", "_"): value for key, value in row.items()}
+    missing = [field for field in fields if field not in normalized]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    for field in fields + tuple(field for field in OPTIONAL_FIELDS if normalized.get(field) not in (None, "")):
+        value = normalized[field]
+        if value is None or (value == "" and field != "Text"):
+            raise ValueError(f"no value for {field}")
+        if field not in FIELD_PARSERS:
+            normalized[field] = str(value)
+            continue
+        parse, dtype = FIELD_PARSERS[field]
+        try:
+            number = parse(value)
+        except (TypeError, ValueError, IndexError, OverflowError):
+            raise ValueError(f"invalid {field} {value!r}") from None
+        if np.issubdtype(dtype, np.integer) and not np.iinfo(dtype).min <= number <= np.iinfo(dtype).max:
+            raise ValueError(f"{field} {value!r} is out of range")
+        normalized[field] = number
+    return normalized
+
+
+def parse_correlation_rows(rows):
+    """
+    Parse dict rows into column arrays.
+
+    Numeric columns are converted here; category columns stay as string lists
+    because their codes belong to the store. Safe to call off the Tk thread.
+    """
+    return {
+        "post1": np.array([parse_post_id(row["Post1_ID"]) for row in rows], dtype=np.int32),
+        "post2": np.array([parse_post_id(row["Post2_ID"]) for row in rows], dtype=np.int32),
+        "student": [row["Student"] for row in rows],
+        "subject": [row["Subject"] for row in rows],
+        "topic": [row["Topics"] for row in rows],
+        "correlation": np.array([float(row["Correlation"]) for row in rows], dtype=np.float32),
+        "time_gap": np.array([parse_time_gap(row["Time_Gap"]) for row in rows], dtype=np.int16),
+        "status": [row.get("Status") or "Filtered" for row in rows],
+        "p_value": np.array([float(row.get("P_Value") or "nan") for row in rows], dtype=np.float32)
+    }
+
+
+def parse_post_rows(rows):
+    """Parse post records into columns for PostCollection.append_columns (thread-safe)"""
+    return {
+        "post_id": np.array([parse_post_id(row["Post_ID"]) for row in rows], dtype=np.int32),
+        "day": np.array([parse_post_day(row["Day"]) for row in rows], dtype=np.int32),
+        "student": [row["Student"] for row in rows],
+        "subject": [row["Subject"] for row in rows],
+        "topic": [row["Topic"] for row in rows],
+        "text": [row["Text"] for row in rows]
+    }
+
+
+def iter_row_chunks(path, chunk_size=LOAD_CHUNK_SIZE, first_chunk_size=FIRST_CHUNK_SIZE,
+                    cancel_event=None):
+    """
+    Stream correlation rows or posts from a CSV or JSONL file.
+
+    Yields (rows, fraction_read). Files whose records carry a Text column are
+    read as posts, anything else as correlation rows. The first chunk is kept
+    small so the first rows can be shown almost immediately; later chunks use
+    chunk_size. A record that cannot be stored raises ValueError with its
+    1-based record number.
+    """
+    total_bytes = max(os.path.getsize(path), 1)
+    is_jsonl = path.lower().endswith((".jsonl", ".json"))
+
+    with open(path, "rb") as handle:
+        lines = (line.decode("utf-8-sig") for line in handle)
+        if is_jsonl:
+            records = (json.loads(line) for line in lines if line.strip())
+        else:
+            records = csv.DictReader(lines)
+
+        chunk = []
+        limit = first_chunk_size
+        fields = None
+        for number, record in enumerate(records, start=1):
+            try:
+                if fields is None:
+                    fields = POST_FIELDS if "Text" in normalize_row(record, fields=()) else ROW_FIELDS
+                chunk.append(normalize_row(record, fields))
+            except ValueError as e:
+                raise ValueError(f"record {number}: {e}") from None
+            if len(chunk) >= limit:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield chunk, handle.tell() / total_bytes
+                chunk = []
+                limit = chunk_size
+
+        if chunk:
+            yield chunk, 1.0
+
+
+class CategoryCodes:
+    """Two-way mapping between string labels and compact integer codes"""
+
+    def __init__(self):
+        self.labels = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def encode(self, values):
+        codes = self.codes
+        labels = self.labels
+        result = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(labels)
+                labels.append(value)
+            result[i] = code
+        return result
+
+    def decode(self, code):
+        return self.labels[code]
+
+    def ranks(self):
+        """Alphabetical rank of every code, so sorting by rank sorts by label"""
+        ranks = np.empty(len(self.labels), dtype=np.int32)
+        ranks[np.argsort(np.array(self.labels, dtype=object), kind='stable')] = np.arange(len(self.labels))
+        return ranks
+
+
+class CorrelationStore:
+    """
+    Columnar store for post-pair correlation rows.
+
+    Rows live in a growable NumPy structured array; student, subject, topic and
+    status strings are kept once in CategoryCodes and referenced by integer code.
+    """
+
+    def __init__(self, capacity=1024):
+        self.data = np.zeros(capacity, dtype=CORRELATION_DTYPE)
+        self.size = 0
+        self._sort_orders = {}
+        self.students = CategoryCodes()
+        self.subjects = CategoryCodes()
+        self.topics = CategoryCodes()
+        self.statuses = CategoryCodes()
+
+    @classmethod
+    def from_rows(cls, rows):
+        store = cls(capacity=max(len(rows), 1))
+        store.append_rows(rows)
+        return store
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def rows(self):
+        return self.data[:self.size]
+
+    def _reserve(self, extra):
+        needed = self.size + extra
+        if needed <= len(self.data):
+            return
+        capacity = max(needed, 2 * len(self.data))
+        grown = np.zeros(capacity, dtype=CORRELATION_DTYPE)
+        grown[:self.size] = self.data[:self.size]
+        self.data = grown
+
+    def append_rows(self, rows):
+        """Append dict rows (as in the sample data) and return the slice they occupy"""
+        return self.append_columns(parse_correlation_rows(rows))
+
+    def append_columns(self, columns):
+        """Append columns produced by parse_correlation_rows and return their slice"""
+        count = len(columns["correlation"])
+        self._reserve(count)
+        start = self.size
+        chunk = self.data[start:start + count]
+
+        chunk["post1"] = columns["post1"]
+        chunk["post2"] = columns["post2"]
+        chunk["student"] = self.students.encode(columns["student"])
+        chunk["subject"] = self.subjects.encode(columns["subject"])
+        chunk["topic"] = self.topics.encode(columns["topic"])
+        chunk["correlation"] = columns["correlation"]
+        chunk["time_gap"] = columns["time_gap"]
+        chunk["status"] = self.statuses.encode(columns["status"])
+        chunk["p_value"] = columns.get("p_value", np.nan)
+
+        self.size += count
+        self._sort_orders.clear()
+        return slice(start, self.size)
+
+    def sort_order(self, field):
+        """Row indices in ascending order of a field, cached until the rows change"""
+        order = self._sort_orders.get(field)
+        if order is None:
+            keys = self.rows[field]
+            categories = {"student": self.students, "subject": self.subjects,
+                          "topic": self.topics, "status": self.statuses}.get(field)
+            if categories is not None:
+                keys = categories.ranks()[keys]
+            order = self._sort_orders[field] = np.argsort(keys, kind='stable')
+        return order
+
+    def invalidate_orders(self, *fields):
+        for field in fields:
+            self._sort_orders.pop(field, None)
+
+    def correlation_order(self):
+        """Row indices sorted by correlation, cached until the next append"""
+        return self.sort_order("correlation")
+
+    def correlation_mask(self, min_correlation):
+        # Compare in float32 so thresholds typed by the user match the stored values exactly
+        return self.rows["correlation"] >= np.float32(min_correlation)
+
+    def row_values(self, index):
+        """Treeview values for one stored row"""
+        row = self.data[index]
+        return (
+            format_post_id(row["post1"]), format_post_id(row["post2"]),
+            self.students.decode(row["student"]), self.subjects.decode(row["subject"]),
+            self.topics.decode(row["topic"]), f"{row['correlation']:.3f}",
+            f"{row['time_gap']} days", self.statuses.decode(row["status"]),
+            "--" if np.isnan(row["p_value"]) else f"{row['p_value']:.4f}"
+        )
+
+    def group_statistics(self, by=("student", "subject"), mask=None):
+        """
+        Vectorized count/mean/std/min/max of correlation grouped by category columns.
+
+        Returns a list of dicts, one per group, keyed by the decoded category labels.
+        """
+        rows = self.rows if mask is None else self.rows[mask]
+        if len(rows) == 0:
+            return []
+
+        # Pack the grouping codes into one integer key per row
+        key = np.zeros(len(rows), dtype=np.int64)
+        for column in by:
+            key = key * len(getattr(self, column + "s")) + rows[column]
+
+        groups, inverse = np.unique(key, return_inverse=True)
+        values = rows["correlation"].astype(np.float64)
+
+        count = np.bincount(inverse)
+        mean = np.bincount(inverse, weights=values) / count
+        variance = np.bincount(inverse, weights=(values - mean[inverse]) ** 2) / count
+        minimum = np.full(len(groups), np.inf)
+        maximum = np.full(len(groups), -np.inf)
+        np.minimum.at(minimum, inverse, values)
+        np.maximum.at(maximum, inverse, values)
+
+        first_rows = rows[np.unique(inverse, return_index=True)[1]]
+        results = []
+        for g in range(len(groups)):
+            result = {column.capitalize(): getattr(self, column + "s").decode(first_rows[column][g])
+                      for column in by}
+            result.update({"Count": int(count[g]), "Mean": float(mean[g]),
+                           "Std": float(np.sqrt(variance[g])),
+                           "Min": float(minimum[g]), "Max": float(maximum[g])})
+            results.append(result)
+        return results
+
+
+class RunningGroupStatistics:
+    """
+    Incremental correlation statistics per (student, subject) group.
+
+    Keeps count, mean and M2 (Welford, merged a batch at a time), min/max and a
+    fixed-bin histogram. Rows can be added and removed, so streaming loads and
+    filter changes only touch the rows involved.
+    """
+
+    def __init__(self, bins=HISTOGRAM_BINS, capacity=64):
+        self.bins = bins
+        self.group_index = {}
+        self.keys = []
+        self.size = 0
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.mean = np.zeros(capacity)
+        self.m2 = np.zeros(capacity)
+        self.minimum = np.full(capacity, np.inf)
+        self.maximum = np.full(capacity, -np.inf)
+        self.histogram = np.zeros((capacity, bins), dtype=np.int64)
+        self.dirty = set()
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self):
+        capacity = 2 * len(self.count)
+        for name, fill in (("count", 0), ("mean", 0.0), ("m2", 0.0),
+                           ("minimum", np.inf), ("maximum", -np.inf)):
+            old = getattr(self, name)
+            new = np.full(capacity, fill, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, name, new)
+        histogram = np.zeros((capacity, self.bins), dtype=np.int64)
+        histogram[:self.size] = self.histogram[:self.size]
+        self.histogram = histogram
+
+    def group_ids(self, students, subjects):
+        """Map student/subject code arrays to group indices, creating new groups as needed"""
+        packed = (np.asarray(students, dtype=np.int64) << 32) | np.asarray(subjects, dtype=np.int64)
+        unique, inverse = np.unique(packed, return_inverse=True)
+        ids = np.empty(len(unique), dtype=np.int64)
+        for i, key in enumerate(unique.tolist()):
+            group = self.group_index.get(key)
+            if group is None:
+                if self.size == len(self.count):
+                    self._grow()
+                group = self.group_index[key] = self.size
+                self.keys.append((key >> 32, key & 0xFFFFFFFF))
+                self.size += 1
+            ids[i] = group
+        return ids[inverse]
+
+    def _bin(self, values):
+        return np.clip((values * self.bins).astype(np.int64), 0, self.bins - 1)
+
+    def _batch_moments(self, groups, values):
+        counts = np.bincount(groups, minlength=self.size)
+        touched = np.flatnonzero(counts)
+        batch_mean = np.zeros(self.size)
+        batch_mean[touched] = np.bincount(groups, weights=values, minlength=self.size)[touched] / counts[touched]
+        batch_m2 = np.bincount(groups, weights=(values - batch_mean[groups]) ** 2, minlength=self.size)
+        return touched, counts[touched], batch_mean[touched], batch_m2[touched]
+
+    def add(self, students, subjects, values):
+        if len(values) == 0:
+            return
+        groups = self.group_ids(students, subjects)
+        values = np.asarray(values, dtype=np.float64)
+        touched, n_b, mean_b, m2_b = self._batch_moments(groups, values)
+
+        # Chan et al. merge of the batch moments into the running moments
+        n_a = self.count[touched]
+        n = n_a + n_b
+        delta = mean_b - self.mean[touched]
+        self.mean[touched] += delta * n_b / n
+        self.m2[touched] += m2_b + delta ** 2 * n_a * n_b / n
+        self.count[touched] = n
+
+        np.minimum.at(self.minimum, groups, values)
+        np.maximum.at(self.maximum, groups, values)
+        np.add.at(self.histogram, (groups, self._bin(values)), 1)
+        self.dirty.update(touched.tolist())
+
+    def remove(self, students, subjects, values):
+        """
+        Remove previously added rows.
+
+        Returns (stale_min, stale_max): groups whose min or max was among the
+        removed values and must be refreshed with set_extremes.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if len(values) == 0:
+            return empty, empty
+        groups = self.group_ids(students, subjects)
+        values = np.asarray(values, dtype=np.float64)
+        touched, n_b, mean_b, m2_b = self._batch_moments(groups, values)
+
+        # Inverse of the merge: recover the moments of the remaining rows
+        n_total = self.count[touched]
+        n = n_total - n_b
+        remaining = n > 0
+        safe_n = np.where(remaining, n, 1)
+        mean_rest = (n_total * self.mean[touched] - n_b * mean_b) / safe_n
+        delta = mean_b - mean_rest
+        m2_rest = self.m2[touched] - m2_b - delta ** 2 * n * n_b / n_total
+
+        self.count[touched] = np.where(remaining, n, 0)
+        self.mean[touched] = np.where(remaining, mean_rest, 0.0)
+        self.m2[touched] = np.where(remaining, np.maximum(m2_rest, 0.0), 0.0)
+        np.subtract.at(self.histogram, (groups, self._bin(values)), 1)
+
+        removed_min = np.full(self.size, np.inf)
+        removed_max = np.full(self.size, -np.inf)
+        np.minimum.at(removed_min, groups, values)
+        np.maximum.at(removed_max, groups, values)
+        stale_min = touched[remaining & (removed_min[touched] <= self.minimum[touched])]
+        stale_max = touched[remaining & (removed_max[touched] >= self.maximum[touched])]
+
+        emptied = touched[~remaining]
+        self.minimum[emptied] = np.inf
+        self.maximum[emptied] = -np.inf
+        self.dirty.update(touched.tolist())
+        return stale_min, stale_max
+
+    def set_extremes(self, groups, minimum=None, maximum=None):
+        if minimum is not None:
+            self.minimum[groups] = minimum
+        if maximum is not None:
+            self.maximum[groups] = maximum
+        self.dirty.update(np.asarray(groups).tolist())
+
+    def variance(self, group):
+        count = self.count[group]
+        return self.m2[group] / count if count > 0 else 0.0
+
+    def pop_dirty(self):
+        dirty = sorted(self.dirty)
+        self.dirty.clear()
+        return dirty
+
+
+def permutation_pvalues(store, n_permutations=PERMUTATIONS, seed=0, group_similarity=None):
+    """
+    Per-row p-values from a partner-permutation test.
+
+    For a pair (a, b) the null draws keep one endpoint, chosen at random, and swap
+    the other for a random post of the same student and subject; the statistic is
+    the correlation of the resulting pair, read from the group's correlation
+    matrix. All permutations for a batch of rows are drawn and gathered as one
+    array operation. Pairs that have no correlation, and the original pair
+    itself, are left out of the null. p = (1 + #null >= observed) / (1 + #null),
+    floored at 1 / (1 + distinct null pairs) so that small groups cannot report
+    more confidence than their few possible partners support.
+
+    group_similarity(student, subject) should return the post ids of a group and
+    the full correlation matrix between them, e.g. CorrelationCache.group_similarity.
+    Without it the matrix is built from the stored rows only; if those were
+    filtered by a correlation threshold, every pair is compared against other
+    strong pairs and the p-values come out too large.
+    """
+    rows = store.rows
+    p_values = np.ones(len(rows), dtype=np.float32)
+    if len(rows) == 0:
+        return p_values
+
+    rng = np.random.default_rng(seed)
+    key = (rows["student"].astype(np.int64) << 32) | rows["subject"]
+    order = np.argsort(key, kind='stable')
+    boundaries = np.flatnonzero(np.diff(key[order])) + 1
+    batch_rows = max(1, SIGNIFICANCE_BATCH // n_permutations)
+
+    for group in np.split(order, boundaries):
+        stored_posts = np.unique(np.concatenate([rows["post1"][group], rows["post2"][group]]))
+        posts = None
+        if group_similarity is not None:
+            posts, matrix = group_similarity(store.students.decode(rows["student"][group[0]]),
+                                             store.subjects.decode(rows["subject"][group[0]]))
+            if not np.isin(stored_posts, posts).all():
+                posts = None
+        from_store = posts is None
+        if from_store:
+            posts = stored_posts
+        if len(posts) < 3:
+            continue
+        local_a = np.searchsorted(posts, rows["post1"][group])
+        local_b = np.searchsorted(posts, rows["post2"][group])
+
+        if from_store:
+            # Group correlation matrix from the stored rows; NaN marks pairs with no stored correlation
+            matrix = np.full((len(posts), len(posts)), np.nan, dtype=np.float32)
+            matrix[local_a, local_b] = rows["correlation"][group]
+            matrix[local_b, local_a] = rows["correlation"][group]
+        partners = (~np.isnan(matrix)).sum(axis=1)
+
+        for start in range(0, len(group), batch_rows):
+            a = local_a[start:start + batch_rows, None]
+            b = local_b[start:start + batch_rows, None]
+            observed = rows["correlation"][group[start:start + batch_rows], None]
+
+            keep_a = rng.random((len(a), n_permutations)) < 0.5
+            anchor = np.where(keep_a, a, b)
+            swapped = np.where(keep_a, b, a)
+            partner = rng.integers(0, len(posts), size=(len(a), n_permutations))
+
+            null = matrix[anchor, partner]
+            valid = ~np.isnan(null) & (partner != swapped)
+            extreme = (null >= observed) & valid
+            p_value = (1 + extreme.sum(axis=1)) / (1 + valid.sum(axis=1))
+            floor = 1 / np.maximum(partners[a[:, 0]] + partners[b[:, 0]] - 1, 1)
+            p_values[group[start:start + batch_rows]] = np.maximum(p_value, floor)
+
+    return p_values
+
+
+def find_topic_gaps(store, threshold, time_window=None, mask=None):
+    """
+    Find topics and topic clusters that are disconnected from the rest of their subject.
+
+    Topics are graph nodes and every row whose correlation reaches the threshold
+    (within the time window, if given) is an edge. Connected components are found
+    with a union-find in O(E * alpha(V)). Per subject, the largest component is the
+    core; every other component is reported as an isolated topic or detached cluster.
+    """
+    rows = store.rows if mask is None else store.rows[mask]
+    if len(rows) == 0:
+        return []
+
+    # Resolve each distinct (subject, topic pair) label once instead of once per row
+    n_topics = max(len(store.topics), 1)
+    pair_keys = rows["subject"].astype(np.int64) * n_topics + rows["topic"]
+    unique_pairs, pair_inverse = np.unique(pair_keys, return_inverse=True)
+
+    topic_ids = {}
+    node_subjects = []
+    node_topics = []
+    pair_nodes = np.full((len(unique_pairs), 2), -1, dtype=np.int64)
+    for p, pair_key in enumerate(unique_pairs):
+        subject = store.subjects.decode(int(pair_key) // n_topics)
+        topics = split_topics(store.topics.decode(int(pair_key) % n_topics))
+        for side, topic in enumerate(topics):
+            key = (subject, topic)
+            if key not in topic_ids:
+                topic_ids[key] = len(node_topics)
+                node_subjects.append(subject)
+                node_topics.append(topic)
+            pair_nodes[p, side] = topic_ids[key]
+
+    edge_mask = rows["correlation"] >= np.float32(threshold)
+    if time_window is not None:
+        edge_mask &= rows["time_gap"] <= time_window
+    edges = pair_nodes[pair_inverse[edge_mask]]
+    edges = np.unique(edges[(edges >= 0).all(axis=1)], axis=0)
+
+    union_find = TopicUnionFind(len(node_topics))
+    for a, b in edges.tolist():
+        union_find.union(a, b)
+
+    # Group nodes by subject, then by component root
+    subjects = {}
+    for node, subject in enumerate(node_subjects):
+        subjects.setdefault(subject, {}).setdefault(union_find.find(node), []).append(node_topics[node])
+
+    gaps = []
+    for subject, components in subjects.items():
+        ordered = sorted(components.values(), key=len, reverse=True)
+        gaps.append({
+            "Subject": subject,
+            "Core": ordered[0],
+            "Isolated": [component[0] for component in ordered[1:] if len(component) == 1],
+            "Clusters": [component for component in ordered[1:] if len(component) > 1]
+        })
+
+    return gaps
+
+
+# Correlation engine: posts -> L2-normalized TF-IDF vectors -> cosine correlation
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Approximate top-k (signed random projections) defaults, tuned for about 0.9 top-k recall
+LSH_BUCKET_TARGET = 16
+LSH_TABLES = 16
+LSH_PROBES = 4
+LSH_MAX_BUCKET = 256
+LSH_POST_CHUNK = 20000
+PAIR_CHUNK = 50000
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def ragged_arange(starts, counts):
+    """Concatenate arange(start, start + count) for every start/count pair"""
+    counts = np.asarray(counts, dtype=np.int64)
+    total = int(counts.sum())
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(np.asarray(starts, dtype=np.int64) - offsets, counts) + np.arange(total)
+
+
+class PostCollection:
+    """Columnar table of posts; the text column feeds PostVectors"""
+
+    def __init__(self):
+        self.post_id = np.zeros(0, dtype=np.int32)
+        self.day = np.zeros(0, dtype=np.int32)
+        self.student = np.zeros(0, dtype=np.int32)
+        self.subject = np.zeros(0, dtype=np.int32)
+        self.topic = np.zeros(0, dtype=np.int32)
+        self.texts = []
+        self.students = CategoryCodes()
+        self.subjects = CategoryCodes()
+        self.topics = CategoryCodes()
+
+    def __len__(self):
+        return len(self.texts)
+
+    def append_rows(self, rows):
+        self.append_columns(parse_post_rows(rows))
+
+    def append_columns(self, columns):
+        self.post_id = np.concatenate([self.post_id, columns["post_id"]])
+        self.day = np.concatenate([self.day, columns["day"]])
+        self.student = np.concatenate([self.student, self.students.encode(columns["student"])])
+        self.subject = np.concatenate([self.subject, self.subjects.encode(columns["subject"])])
+        self.topic = np.concatenate([self.topic, self.topics.encode(columns["topic"])])
+        self.texts.extend(columns["text"])
+
+    def groups(self):
+        """Post indices for every (student, subject) combination"""
+        key = (self.student.astype(np.int64) << 32) | self.subject
+        order = np.argsort(key, kind='stable')
+        boundaries = np.flatnonzero(np.diff(key[order])) + 1
+        return np.split(order, boundaries) if len(order) else []
+
+    def pair_columns(self, rows_a, rows_b, correlation, status):
+        """Columns for CorrelationStore.append_columns describing post pairs"""
+        def joined(codes, table):
+            return [table.decode(a) if a == b else f"{table.decode(a)} / {table.decode(b)}"
+                    for a, b in zip(codes[rows_a].tolist(), codes[rows_b].tolist())]
+
+        return {
+            "post1": self.post_id[rows_a],
+            "post2": self.post_id[rows_b],
+            "student": joined(self.student, self.students),
+            "subject": joined(self.subject, self.subjects),
+            "topic": [f"{self.topics.decode(a)} - {self.topics.decode(b)}"
+                      for a, b in zip(self.topic[rows_a].tolist(), self.topic[rows_b].tolist())],
+            "correlation": np.asarray(correlation, dtype=np.float32),
+            "time_gap": np.abs(self.day[rows_a] - self.day[rows_b]).astype(np.int16),
+            "status": [status] * len(rows_a)
+        }
+
+
+class PostVectors:
+    """
+    L2-normalized TF-IDF vectors in CSR form.
+
+    Terms are identified by their CRC32 hash; the vocabulary is the sorted array of
+    hashes and column j of the matrix is vocabulary[j].
+    """
+
+    def __init__(self, vocabulary, idf, indptr, indices, data):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @staticmethod
+    def hash_documents(texts):
+        hashes = [np.fromiter((zlib.crc32(token.encode()) for token in tokenize(text)), dtype=np.uint32)
+                  for text in texts]
+        lengths = np.array([len(h) for h in hashes], dtype=np.int64)
+        flat = np.concatenate(hashes) if hashes else np.zeros(0, dtype=np.uint32)
+        return flat, lengths
+
+    @classmethod
+    def fit(cls, texts):
+        flat, lengths = cls.hash_documents(texts)
+        vocabulary = np.unique(flat)
+        doc_ids = np.repeat(np.arange(len(lengths)), lengths)
+        columns = np.searchsorted(vocabulary, flat)
+
+        # Document frequency counts each term once per post
+        pairs = np.unique(doc_ids * len(vocabulary) + columns)
+        document_frequency = np.bincount(pairs % max(len(vocabulary), 1), minlength=len(vocabulary))
+        idf = (np.log((1 + len(lengths)) / (1 + document_frequency)) + 1).astype(np.float32)
+        return cls._build(vocabulary, idf, doc_ids, columns, len(lengths))
+
+    @classmethod
+    def transform(cls, texts, vocabulary, idf):
+        """Vectorize texts against an existing vocabulary/IDF; unseen terms are dropped"""
+        flat, lengths = cls.hash_documents(texts)
+        doc_ids = np.repeat(np.arange(len(lengths)), lengths)
+        columns = np.searchsorted(vocabulary, flat)
+        known = (columns < len(vocabulary)) & (vocabulary[np.minimum(columns, len(vocabulary) - 1)] == flat)
+        return cls._build(vocabulary, idf, doc_ids[known], columns[known], len(lengths))
+
+    @classmethod
+    def _build(cls, vocabulary, idf, doc_ids, columns, n_docs):
+        width = max(len(vocabulary), 1)
+        keys, counts = np.unique(doc_ids.astype(np.int64) * width + columns, return_counts=True)
+        rows = keys // width
+        indices = (keys % width).astype(np.int32)
+        data = counts.astype(np.float32) * idf[indices]
+
+        norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=n_docs))
+        data /= np.maximum(norms[rows], 1e-12).astype(np.float32)
+
+        indptr = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_docs), out=indptr[1:])
+        return cls(vocabulary, idf, indptr, indices, data)
+
+    def row_entries(self, rows):
+        """Flat positions of the nonzeros of the given rows and the owning row slot"""
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = self.indptr[rows + 1] - self.indptr[rows]
+        positions = ragged_arange(self.indptr[rows], counts)
+        return positions, np.repeat(np.arange(len(rows)), counts)
+
+    def dense(self, rows):
+        """Dense matrix for the given rows over the columns they actually use"""
+        positions, slots = self.row_entries(rows)
+        columns, local = np.unique(self.indices[positions], return_inverse=True)
+        matrix = np.zeros((len(rows), len(columns)), dtype=np.float32)
+        matrix[slots, local] = self.data[positions]
+        return matrix
+
+    def project(self, projections, chunk_rows=LSH_POST_CHUNK):
+        """Multiply the sparse rows by a dense (vocabulary x m) projection matrix"""
+        result = np.zeros((len(self), projections.shape[1]), dtype=np.float32)
+        for start in range(0, len(self), chunk_rows):
+            rows = np.arange(start, min(start + chunk_rows, len(self)))
+            positions, slots = self.row_entries(rows)
+            if len(positions) == 0:
+                continue
+            contributions = self.data[positions, None] * projections[self.indices[positions]]
+            # Row sums with reduceat; empty rows are skipped because reduceat cannot express them
+            bounds = self.indptr[start:rows[-1] + 2] - self.indptr[start]
+            nonempty = bounds[1:] > bounds[:-1]
+            result[rows[nonempty]] = np.add.reduceat(contributions, bounds[:-1][nonempty], axis=0)
+        return result
+
+    def pair_cosines(self, rows_a, rows_b, chunk=PAIR_CHUNK):
+        """Exact cosine for each (rows_a[i], rows_b[i]) by sort-joining their nonzeros"""
+        rows_a = np.asarray(rows_a, dtype=np.int64)
+        rows_b = np.asarray(rows_b, dtype=np.int64)
+        result = np.zeros(len(rows_a), dtype=np.float32)
+        width = np.int64(max(len(self.vocabulary), 1))
+
+        for start in range(0, len(rows_a), chunk):
+            stop = min(start + chunk, len(rows_a))
+            pos_a, slot_a = self.row_entries(rows_a[start:stop])
+            pos_b, slot_b = self.row_entries(rows_b[start:stop])
+            keys = np.concatenate([slot_a * width + self.indices[pos_a], slot_b * width + self.indices[pos_b]])
+            weights = np.concatenate([self.data[pos_a], self.data[pos_b]])
+
+            # Within a row each column appears once, so a repeated key is a shared term
+            order = np.argsort(keys, kind='stable')
+            keys = keys[order]
+            weights = weights[order]
+            shared = np.flatnonzero(keys[1:] == keys[:-1])
+            products = weights[shared] * weights[shared + 1]
+            result[start:stop] = np.bincount(keys[shared] // width, weights=products, minlength=stop - start)
+        return result
+
+
+def exact_top_pairs(vectors, k, rows=None, block_size=512):
+    """
+    Exact top-k most correlated pairs by blocked dense Gram products.
+
+    O(n^2): intended for per-group data and for measuring the recall of
+    approximate_top_pairs on a sample.
+    """
+    rows = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    matrix = vectors.dense(rows)
+    best_a = np.zeros(0, dtype=np.int64)
+    best_b = np.zeros(0, dtype=np.int64)
+    best_corr = np.zeros(0, dtype=np.float32)
+
+    for start in range(0, len(rows), block_size):
+        block = matrix[start:start + block_size] @ matrix[start:].T
+        local_a, local_b = np.nonzero(np.triu(np.ones(block.shape, dtype=bool), k=1))
+        corr = block[local_a, local_b]
+        if len(corr) > k:
+            keep = np.argpartition(-corr, k - 1)[:k]
+            local_a, local_b, corr = local_a[keep], local_b[keep], corr[keep]
+
+        best_a = np.concatenate([best_a, rows[start + local_a]])
+        best_b = np.concatenate([best_b, rows[start + local_b]])
+        best_corr = np.concatenate([best_corr, corr])
+        if len(best_corr) > k:
+            keep = np.argpartition(-best_corr, k - 1)[:k]
+            best_a, best_b, best_corr = best_a[keep], best_b[keep], best_corr[keep]
+
+    order = np.argsort(-best_corr, kind='stable')
+    return best_a[order], best_b[order], best_corr[order]
+
+
+def _sorted_unique(values):
+    # Sort-based unique; much faster than np.unique's hashing path for large int64 arrays
+    values = np.sort(values)
+    if len(values) == 0:
+        return values
+    return values[np.concatenate([[True], values[1:] != values[:-1]])]
+
+
+def _bucket_pairs(sorted_codes, order, probe_codes, posts, max_bucket):
+    """Candidate pairs between posts and the members of the buckets they probe"""
+    low = np.searchsorted(sorted_codes, probe_codes, side='left')
+    high = np.searchsorted(sorted_codes, probe_codes, side='right')
+    counts = np.minimum(high - low, max_bucket)
+    members = order[ragged_arange(low, counts)]
+    owners = np.repeat(posts, counts)
+    keep = owners != members
+    return owners[keep], members[keep]
+
+
+def approximate_top_pairs(vectors, k, n_bits=None, n_tables=LSH_TABLES, n_probes=LSH_PROBES,
+                          max_bucket=LSH_MAX_BUCKET, seed=0):
+    """
+    Approximate top-k most correlated post pairs with signed random projections.
+
+    Each table hashes posts to an n_bits SimHash code. Posts are compared with
+    their own bucket and, multi-probe style, with the buckets reached by flipping
+    the n_probes bits whose projections were closest to zero. Every distinct
+    candidate pair gets an exact cosine, so a pair is only missed when no table
+    puts its posts in a probed bucket. By default n_bits is chosen so an average
+    bucket holds about LSH_BUCKET_TARGET posts.
+    """
+    n_posts = len(vectors)
+    if n_bits is None:
+        n_bits = int(np.clip(np.round(np.log2(max(n_posts, 2) / LSH_BUCKET_TARGET)), 4, 24))
+    n_probes = min(n_probes, n_bits)
+    rng = np.random.default_rng(seed)
+    projections = rng.standard_normal((len(vectors.vocabulary), n_bits * n_tables)).astype(np.float32)
+    projected = vectors.project(projections)
+
+    signs = projected > 0
+    weights = np.int64(1) << np.arange(n_bits, dtype=np.int64)
+
+    best_keys = np.zeros(0, dtype=np.int64)
+    best_corr = np.zeros(0, dtype=np.float32)
+
+    for table in range(n_tables):
+        table_bits = slice(table * n_bits, (table + 1) * n_bits)
+        codes = signs[:, table_bits].astype(np.int64) @ weights
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+
+        # Query-directed probing: flip the least confident bits of every post
+        flips = np.argsort(np.abs(projected[:, table_bits]), axis=1)[:, :n_probes]
+
+        for start in range(0, n_posts, LSH_POST_CHUNK):
+            posts = np.arange(start, min(start + LSH_POST_CHUNK, n_posts))
+            owners = [posts]
+            probes = [codes[posts]]
+            for probe in range(n_probes):
+                owners.append(posts)
+                probes.append(codes[posts] ^ weights[flips[posts, probe]])
+
+            pair_a, pair_b = _bucket_pairs(sorted_codes, order, np.concatenate(probes),
+                                           np.concatenate(owners), max_bucket)
+            low = np.minimum(pair_a, pair_b)
+            high = np.maximum(pair_a, pair_b)
+            keys = _sorted_unique(low * n_posts + high)
+            # Pairs already in the running top-k were found by an earlier table
+            keys = keys[~np.isin(keys, best_keys)]
+
+            corr = vectors.pair_cosines(keys // n_posts, keys % n_posts)
+            best_keys = np.concatenate([best_keys, keys])
+            best_corr = np.concatenate([best_corr, corr])
+            if len(best_corr) > k:
+                keep = np.argpartition(-best_corr, k - 1)[:k]
+                best_keys, best_corr = best_keys[keep], best_corr[keep]
+
+    order = np.argsort(-best_corr, kind='stable')
+    return best_keys[order] // n_posts, best_keys[order] % n_posts, best_corr[order]
+
+
+def measure_topk_recall(vectors, k, sample_size=2000, seed=0, **lsh_options):
+    """
+    Recall of approximate_top_pairs against exact_top_pairs on a random sample of posts.
+
+    Returns a dict with recall and the time spent by each method. With the
+    default LSH options top-200 recall is about 0.9 on 3,000 posts drawn from 50
+    topics, where many pairs tie near the cut-off; raising n_tables or n_probes
+    trades time for recall.
+    """
+    rng = np.random.default_rng(seed)
+    sample = np.sort(rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False))
+    sampled = PostVectors(vectors.vocabulary, vectors.idf, *_csr_subset(vectors, sample))
+
+    started = time.perf_counter()
+    exact_a, exact_b, exact_corr = exact_top_pairs(sampled, k)
+    exact_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    approx_a, approx_b, approx_corr = approximate_top_pairs(sampled, k, seed=seed, **lsh_options)
+    approx_seconds = time.perf_counter() - started
+
+    n = len(sample)
+    exact_keys = np.minimum(exact_a, exact_b) * n + np.maximum(exact_a, exact_b)
+    approx_keys = np.minimum(approx_a, approx_b) * n + np.maximum(approx_a, approx_b)
+    recall = len(np.intersect1d(exact_keys, approx_keys)) / max(len(exact_keys), 1)
+    return {"recall": recall, "sample_size": n, "k": k,
+            "exact_seconds": exact_seconds, "approximate_seconds": approx_seconds}
+
+
+def _csr_subset(vectors, rows):
+    positions, slots = vectors.row_entries(rows)
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(vectors.indptr[rows + 1] - vectors.indptr[rows], out=indptr[1:])
+    return indptr, vectors.indices[positions], vectors.data[positions]
+
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    post_id INTEGER PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    student TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    terms BLOB NOT NULL,
+    counts BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_group ON posts (student, subject);
+CREATE TABLE IF NOT EXISTS pairs (
+    post1 INTEGER NOT NULL,
+    post2 INTEGER NOT NULL,
+    correlation REAL NOT NULL,
+    PRIMARY KEY (post1, post2)
+);
+CREATE INDEX IF NOT EXISTS pairs_post2 ON pairs (post2);
+CREATE TABLE IF NOT EXISTS term_frequency (
+    term INTEGER PRIMARY KEY,
+    df INTEGER NOT NULL
+);
+"""
+
+
+class CorrelationCache:
+    """
+    Persistent SQLite cache of post term counts and within-group correlations.
+
+    Posts are keyed by post id and a SHA-1 of their text. update() only vectorizes
+    posts that are new or whose text changed, and only correlates them against the
+    other posts of the same (student, subject) group, so a refresh costs
+    O(new x existing) rather than O(all^2). IDF comes from the document
+    frequencies in the cache at the time a pair is computed, so pairs depend on
+    the order posts arrived in; rebuild() (--rebuild-cache on the command line)
+    recomputes every pair against the current frequencies.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(CACHE_SCHEMA)
+
+        rows = self.connection.execute("SELECT term, df FROM term_frequency ORDER BY term").fetchall()
+        self.df_terms = np.array([row[0] for row in rows], dtype=np.int64)
+        self.df_counts = np.array([row[1] for row in rows], dtype=np.int64)
+        self.n_docs = len(self)
+
+    def close(self):
+        self.connection.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+    def _update_document_frequency(self, terms, delta):
+        if len(terms) == 0:
+            return
+        merged = np.union1d(self.df_terms, terms)
+        counts = np.zeros(len(merged), dtype=np.int64)
+        counts[np.searchsorted(merged, self.df_terms)] = self.df_counts
+        np.add.at(counts, np.searchsorted(merged, terms), delta)
+        self.df_terms = merged
+        self.df_counts = counts
+        changed = np.unique(terms)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO term_frequency (term, df) VALUES (?, ?)",
+            zip(changed.tolist(), counts[np.searchsorted(merged, changed)].tolist())
+        )
+
+    def _idf(self, terms):
+        df = np.zeros(len(terms), dtype=np.int64)
+        if len(self.df_terms):
+            positions = np.minimum(np.searchsorted(self.df_terms, terms), len(self.df_terms) - 1)
+            df = np.where(self.df_terms[positions] == terms, self.df_counts[positions], 0)
+        return np.log((1 + self.n_docs) / (1 + df)) + 1
+
+    def _dense(self, term_lists, count_lists, columns):
+        """Unit-length TF-IDF rows restricted to the given sorted term columns"""
+        matrix = np.zeros((len(term_lists), len(columns)), dtype=np.float32)
+        for row, (terms, counts) in enumerate(zip(term_lists, count_lists)):
+            weights = counts * self._idf(terms)
+            norm = np.sqrt((weights ** 2).sum())
+            positions = np.searchsorted(columns, terms)
+            inside = (positions < len(columns)) & (columns[np.minimum(positions, len(columns) - 1)] == terms)
+            matrix[row, positions[inside]] = weights[inside] / max(norm, 1e-12)
+        return matrix
+
+    def update(self, posts):
+        """
+        Add new or changed posts from a PostCollection and correlate only those.
+
+        Returns a dict with the number of new, changed and unchanged posts and the
+        number of pairs computed.
+        """
+        post_ids = posts.post_id.tolist()
+        hashes = [hashlib.sha1(str(text).encode()).hexdigest() for text in posts.texts]
+        known = dict(self.connection.execute("SELECT post_id, content_hash FROM posts"))
+        todo = [i for i, (post_id, content_hash) in enumerate(zip(post_ids, hashes))
+                if known.get(post_id) != content_hash]
+        changed = [post_ids[i] for i in todo if post_ids[i] in known]
+        summary = {"new": len(todo) - len(changed), "changed": len(changed),
+                   "unchanged": len(post_ids) - len(todo), "pairs": 0}
+        if not todo:
+            return summary
+
+        # Changed posts lose their old terms and pairs before being re-added
+        old_terms = []
+        for post_id in changed:
+            terms = self.connection.execute("SELECT terms FROM posts WHERE post_id = ?", (post_id,)).fetchone()[0]
+            old_terms.append(np.frombuffer(terms, dtype=np.uint32).astype(np.int64))
+            self.connection.execute("DELETE FROM pairs WHERE post1 = ? OR post2 = ?", (post_id, post_id))
+        if old_terms:
+            self._update_document_frequency(np.concatenate(old_terms), -1)
+
+        flat, lengths = PostVectors.hash_documents([posts.texts[i] for i in todo])
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        records = []
+        new_terms = []
+        groups = {}
+        for slot, i in enumerate(todo):
+            terms, counts = np.unique(flat[offsets[slot]:offsets[slot + 1]], return_counts=True)
+            new_terms.append(terms.astype(np.int64))
+            student = posts.students.decode(posts.student[i])
+            subject = posts.subjects.decode(posts.subject[i])
+            records.append((post_ids[i], hashes[i], student, subject, posts.topics.decode(posts.topic[i]),
+                            int(posts.day[i]), terms.astype(np.uint32).tobytes(),
+                            counts.astype(np.uint32).tobytes()))
+            groups.setdefault((student, subject), set()).add(post_ids[i])
+        self.connection.executemany("INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", records)
+        self._update_document_frequency(np.concatenate(new_terms), 1)
+        self.n_docs = len(self)
+
+        for (student, subject), new_ids in groups.items():
+            summary["pairs"] += self._correlate_group(student, subject, new_ids)
+
+        self.connection.commit()
+        return summary
+
+    def _correlate_group(self, student, subject, new_ids):
+        rows = self.connection.execute(
+            "SELECT post_id, terms, counts FROM posts WHERE student = ? AND subject = ?", (student, subject)
+        ).fetchall()
+        ids = np.array([row[0] for row in rows], dtype=np.int64)
+        term_lists = [np.frombuffer(row[1], dtype=np.uint32).astype(np.int64) for row in rows]
+        count_lists = [np.frombuffer(row[2], dtype=np.uint32).astype(np.float64) for row in rows]
+        is_new = np.isin(ids, list(new_ids))
+        new_rows = np.flatnonzero(is_new)
+        old_rows = np.flatnonzero(~is_new)
+
+        # Only the terms of the new posts can contribute to their correlations
+        columns = np.unique(np.concatenate([term_lists[r] for r in new_rows]))
+        if len(columns) == 0:
+            return 0
+        new_matrix = self._dense([term_lists[r] for r in new_rows], [count_lists[r] for r in new_rows], columns)
+        old_matrix = self._dense([term_lists[r] for r in old_rows], [count_lists[r] for r in old_rows], columns)
+
+        pair_a, pair_b, values = [], [], []
+        if len(old_rows):
+            similarity = new_matrix @ old_matrix.T
+            a, b = np.nonzero(similarity > 0)
+            pair_a.append(ids[new_rows[a]])
+            pair_b.append(ids[old_rows[b]])
+            values.append(similarity[a, b])
+        similarity = new_matrix @ new_matrix.T
+        a, b = np.nonzero(np.triu(similarity > 0, k=1))
+        pair_a.append(ids[new_rows[a]])
+        pair_b.append(ids[new_rows[b]])
+        values.append(similarity[a, b])
+
+        pair_a = np.concatenate(pair_a)
+        pair_b = np.concatenate(pair_b)
+        values = np.concatenate(values)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO pairs (post1, post2, correlation) VALUES (?, ?, ?)",
+            zip(np.minimum(pair_a, pair_b).tolist(), np.maximum(pair_a, pair_b).tolist(), values.tolist())
+        )
+        return len(values)
+
+    def rebuild(self):
+        """Recompute every stored pair against the current document frequencies"""
+        self.connection.execute("DELETE FROM pairs")
+        groups = self.connection.execute("SELECT DISTINCT student, subject FROM posts").fetchall()
+        for student, subject in groups:
+            ids = {row[0] for row in self.connection.execute(
+                "SELECT post_id FROM posts WHERE student = ? AND subject = ?", (student, subject))}
+            self._correlate_group(student, subject, ids)
+        self.connection.commit()
+
+    def group_similarity(self, student, subject):
+        """
+        Post ids of a (student, subject) group and the full correlation matrix between them.
+
+        Pairs without a cached row share no terms and correlate 0; the diagonal is NaN.
+        """
+        ids = np.array([row[0] for row in self.connection.execute(
+            "SELECT post_id FROM posts WHERE student = ? AND subject = ? ORDER BY post_id", (student, subject))],
+            dtype=np.int64)
+        pairs = self.connection.execute(
+            "SELECT p.post1, p.post2, p.correlation FROM pairs p JOIN posts a ON a.post_id = p.post1 "
+            "WHERE a.student = ? AND a.subject = ?", (student, subject)
+        ).fetchall()
+
+        matrix = np.zeros((len(ids), len(ids)), dtype=np.float32)
+        if pairs:
+            post1, post2, correlation = (np.array(column) for column in zip(*pairs))
+            a = np.searchsorted(ids, post1)
+            b = np.searchsorted(ids, post2)
+            matrix[a, b] = correlation
+            matrix[b, a] = correlation
+        np.fill_diagonal(matrix, np.nan)
+        return ids, matrix
+
+    def pair_columns(self, min_correlation, time_window=None, post_ids=None, status="Filtered"):
+        """Cached pairs as columns for CorrelationStore.append_columns"""
+        query = ("SELECT p.post1, p.post2, p.correlation, a.student, a.subject, a.topic, b.topic, "
+                 "ABS(a.day - b.day) FROM pairs p "
+                 "JOIN posts a ON a.post_id = p.post1 JOIN posts b ON b.post_id = p.post2 "
+                 "WHERE p.correlation >= ?")
+        parameters = [float(np.float32(min_correlation))]
+        if time_window is not None:
+            query += " AND ABS(a.day - b.day) <= ?"
+            parameters.append(int(time_window))
+        rows = self.connection.execute(query, parameters).fetchall()
+
+        if post_ids is not None:
+            post_ids = np.asarray(post_ids)
+            rows = [row for row, keep in zip(rows, np.isin([row[0] for row in rows], post_ids)
+                                             & np.isin([row[1] for row in rows], post_ids)) if keep]
+
+        return {
+            "post1": np.array([row[0] for row in rows], dtype=np.int32),
+            "post2": np.array([row[1] for row in rows], dtype=np.int32),
+            "student": [row[3] for row in rows],
+            "subject": [row[4] for row in rows],
+            "topic": [f"{row[5]} - {row[6]}" for row in rows],
+            "correlation": np.array([row[2] for row in rows], dtype=np.float32),
+            "time_gap": np.array([row[7] for row in rows], dtype=np.int16),
+            "status": [status] * len(rows)
+        }
+
+
+def correlation_cache_path(posts_path):
+    """The CorrelationCache file kept next to a posts file"""
+    return os.path.splitext(posts_path)[0] + ".correlations.sqlite"
+
+
+# Batch mode: one (student, subject) partition per task across a process pool
+BATCH_MANIFEST = "manifest.json"
+
+# Set in each worker by _attach_shared_vocabulary
+_shared_vocabulary = None
+
+
+def _share_array(array):
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block
+
+
+def _attach_shared_vocabulary(vocabulary_spec, idf_spec):
+    """Pool initializer: map the parent's vocabulary and IDF arrays without copying them"""
+    global _shared_vocabulary
+    arrays = []
+    blocks = []
+    for name, length, dtype in (vocabulary_spec, idf_spec):
+        # Pool workers share the parent's resource tracker, so the parent's unlink stays authoritative
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        arrays.append(np.ndarray((length,), dtype=dtype, buffer=block.buf))
+    _shared_vocabulary = (arrays[0], arrays[1], blocks)
+
+
+def partition_filename(index, student, subject):
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{student}_{subject}").strip("_")
+    return f"{index:05d}_{slug}.csv"
+
+
+def analyze_partition(task):
+    """
+    Correlate and gap-check one (student, subject) partition inside a pool worker.
+
+    Writes the partition's correlation rows as CSV (the Load Data format) and
+    returns its manifest entry.
+    """
+    vocabulary, idf, _ = _shared_vocabulary
+    output_path = os.path.join(task["output_dir"], task["file"])
+    post_ids = np.asarray(task["post_ids"])
+    days = np.asarray(task["days"])
+
+    rows = []
+    if len(post_ids) > 1:
+        vectors = PostVectors.transform(task["texts"], vocabulary, idf)
+        matrix = vectors.dense(np.arange(len(post_ids)))
+        similarity = matrix @ matrix.T
+        upper_a, upper_b = np.triu_indices(len(post_ids), k=1)
+        gaps = np.abs(days[upper_a] - days[upper_b])
+        keep = (similarity[upper_a, upper_b] >= np.float32(task["threshold"])) & (gaps <= task["time_window"])
+        for a, b, gap in zip(upper_a[keep].tolist(), upper_b[keep].tolist(), gaps[keep].tolist()):
+            rows.append({
+                "Post1_ID": format_post_id(post_ids[a]), "Post2_ID": format_post_id(post_ids[b]),
+                "Student": task["student"], "Subject": task["subject"],
+                "Topics": f"{task['topics'][a]} - {task['topics'][b]}",
+                "Correlation": f"{similarity[a, b]:.4f}", "Time_Gap": f"{gap} days", "Status": "Filtered"
+            })
+
+    with open(output_path, "w", newline="", encoding="utf-8") as handle:
+        writer = csv.DictWriter(handle, fieldnames=ROW_FIELDS + ("Status",))
+        writer.writeheader()
+        writer.writerows(rows)
+
+    gaps = find_topic_gaps(CorrelationStore.from_rows(rows), task["threshold"], task["time_window"]) if rows else []
+    return {
+        "Student": task["student"], "Subject": task["subject"], "File": task["file"],
+        "Posts": len(post_ids), "Rows": len(rows),
+        "Isolated": sum(len(gap["Isolated"]) for gap in gaps),
+        "Clusters": sum(len(gap["Clusters"]) for gap in gaps)
+    }
+
+
+def run_batch_analysis(posts_path, output_dir, threshold=0.5, time_window=7, workers=None):
+    """
+    Nightly analysis of every (student, subject) combination in a posts file.
+
+    The vocabulary and IDF are fitted once over all posts and handed to the workers
+    through shared memory. Each partition is written to its own CSV file and a
+    manifest.json indexes them for the GUI. Returns the manifest entries.
+    """
+    posts = PostCollection()
+    for rows, _ in iter_row_chunks(posts_path):
+        posts.append_rows(rows)
+    vectors = PostVectors.fit(posts.texts)
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = []
+    for index, group in enumerate(posts.groups()):
+        student = posts.students.decode(posts.student[group[0]])
+        subject = posts.subjects.decode(posts.subject[group[0]])
+        tasks.append({
+            "student": student, "subject": subject, "output_dir": output_dir,
+            "file": partition_filename(index, student, subject),
+            "post_ids": posts.post_id[group].tolist(), "days": posts.day[group].tolist(),
+            "topics": [posts.topics.decode(code) for code in posts.topic[group].tolist()],
+            "texts": [posts.texts[i] for i in group],
+            "threshold": threshold, "time_window": time_window
+        })
+    # Largest partitions first so the pool does not end on one long straggler
+    tasks.sort(key=lambda task: len(task["post_ids"]), reverse=True)
+
+    vocabulary_block = _share_array(vectors.vocabulary)
+    idf_block = _share_array(vectors.idf)
+    try:
+        initargs = ((vocabulary_block.name, len(vectors.vocabulary), vectors.vocabulary.dtype.str),
+                    (idf_block.name, len(vectors.idf), vectors.idf.dtype.str))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_shared_vocabulary,
+                                 initargs=initargs) as executor:
+            entries = list(executor.map(analyze_partition, tasks, chunksize=max(1, len(tasks) // 64)))
+    finally:
+        vocabulary_block.close()
+        vocabulary_block.unlink()
+        idf_block.close()
+        idf_block.unlink()
+
+    entries.sort(key=lambda entry: (entry["Student"], entry["Subject"]))
+    manifest = {"Source": os.path.abspath(posts_path), "Threshold": threshold,
+                "Time_Window": time_window, "Partitions": entries}
+    with open(os.path.join(output_dir, BATCH_MANIFEST), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return entries
 
 
 class PostCorrelationAnalysis:
@@ -30,9 +1434,40 @@ class PostCorrelationAnalysis:
              "Status": "Filtered"}
         ]
 
-        self.filtered_data = self.sample_data.copy()
+        self.store = CorrelationStore.from_rows(self.sample_data)
+        self.filtered_index = np.arange(len(self.store))
+        self.active_min_correlation = None
+        self.statistics = RunningGroupStatistics()
+        self.histogram_group = None
+
+        # Table view: filtered rows in display order and the first one shown
+        self.sort_column = None
+        self.sort_descending = False
+        self.sorted_view = self.filtered_index
+        self.tree_offset = 0
+        self.view_stale = False  # Rows were loaded since sorted_view was last rebuilt
+
+        # Posts loaded from disk feed the correlation engine
+        self.posts = PostCollection()
+        self.post_vectors = None
+        self.correlation_cache = None
+
+        # Full within-group correlations behind the store, when it came from the cache
+        self.group_similarity = None
+
+        # Batch results are listed from a manifest and loaded one partition at a time
+        self.batch_dir = None
+        self.batch_partitions = []
+
+        # Background loader state; load_queue stays set until _finish_load has drained it
+        self.load_queue = None
+        self.load_cancel = None
+        self.load_thread = None
+
         self.create_widgets()
         self.populate_data()
+        self.update_subject_info()
+        self.add_to_statistics(self.filtered_index)
 
     def create_widgets(self):
         # Main title
@@ -71,10 +1506,44 @@ class PostCorrelationAnalysis:
                                        font=('Arial', 9), command=self.find_gaps)
         self.find_gaps_btn.pack(side='left', padx=5)
 
+        self.topk_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(first_row, text="Approximate Top-k", variable=self.topk_mode, bg='white',
+                       font=('Arial', 9)).pack(side='left', padx=(15, 0))
+        self.topk_entry = tk.Entry(first_row, width=6, font=('Arial', 9))
+        self.topk_entry.insert(0, "100")
+        self.topk_entry.pack(side='left', padx=5)
+
+        # Loader progress row
+        progress_row = tk.Frame(controls_frame, bg='white')
+        progress_row.pack(fill='x', pady=(5, 0))
+
+        self.load_progress = ttk.Progressbar(progress_row, orient='horizontal', length=250,
+                                             mode='determinate', maximum=100)
+        self.load_progress.pack(side='left')
+
+        self.cancel_load_btn = tk.Button(progress_row, text="Cancel", bg='#e0e0e0',
+                                         font=('Arial', 9), command=self.cancel_load, state='disabled')
+        self.cancel_load_btn.pack(side='left', padx=5)
+
+        self.load_status = tk.Label(progress_row, text="", bg='white', font=('Arial', 9), fg='#666')
+        self.load_status.pack(side='left', padx=5)
+
+        # Batch results row
+        batch_row = tk.Frame(controls_frame, bg='white')
+        batch_row.pack(fill='x', pady=(5, 0))
+
+        self.open_batch_btn = tk.Button(batch_row, text="Open Batch Results", bg='#e0e0e0',
+                                        font=('Arial', 9), command=self.open_batch_results)
+        self.open_batch_btn.pack(side='left')
+
+        self.partition_var = tk.StringVar()
+        self.partition_box = ttk.Combobox(batch_row, textvariable=self.partition_var, state='readonly', width=60)
+        self.partition_box.pack(side='left', padx=5)
+        self.partition_box.bind('<<ComboboxSelected>>', self.on_partition_selected)
+
         # Subject info label
-        subject_info = tk.Label(controls_frame, text="Subject: Mathematics | Student: Alice",
-                                bg='white', font=('Arial', 9, 'italic'), fg='#666')
-        subject_info.pack(anchor='w', pady=(5, 0))
+        self.subject_info = tk.Label(controls_frame, text="", bg='white', font=('Arial', 9, 'italic'), fg='#666')
+        self.subject_info.pack(anchor='w', pady=(5, 0))
 
         # Tabs frame
         tabs_frame = tk.Frame(self.root, bg='white')
@@ -88,15 +1557,18 @@ class PostCorrelationAnalysis:
         self.posts_frame = tk.Frame(self.notebook, bg='white')
         self.notebook.add(self.posts_frame, text="Posts Data")
 
-        # Other tabs (placeholders)
-        correlations_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(correlations_frame, text="Correlations")
+        # Analysis tabs
+        self.correlations_frame = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(self.correlations_frame, text="Correlations")
+        self.create_histogram_view()
 
-        gaps_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(gaps_frame, text="Correlation Gaps")
+        self.gaps_frame = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(self.gaps_frame, text="Correlation Gaps")
+        self.create_gaps_view()
 
-        stats_frame = tk.Frame(self.notebook, bg='white')
-        self.notebook.add(stats_frame, text="Statistics")
+        self.stats_frame = tk.Frame(self.notebook, bg='white')
+        self.notebook.add(self.stats_frame, text="Statistics")
+        self.create_statistics_view()
 
         # Filters section
         filters_frame = tk.Frame(self.posts_frame, bg='white')
@@ -116,6 +1588,16 @@ class PostCorrelationAnalysis:
                                           font=('Arial', 9), command=self.apply_filter)
         self.apply_filter_btn.pack(side='left', padx=5)
 
+        tk.Label(filter_controls, text="Significance Level:", bg='white', font=('Arial', 9)).pack(side='left',
+                                                                                              padx=(20, 0))
+        self.significance_alpha = tk.Entry(filter_controls, width=8, font=('Arial', 9))
+        self.significance_alpha.insert(0, str(SIGNIFICANCE_ALPHA))
+        self.significance_alpha.pack(side='left', padx=(5, 10))
+
+        self.significance_btn = tk.Button(filter_controls, text="Test Significance", bg='#e0e0e0',
+                                          font=('Arial', 9), command=self.test_significance)
+        self.significance_btn.pack(side='left', padx=5)
+
         # Treeview for data display
         self.create_treeview()
 
@@ -126,47 +1608,467 @@ class PostCorrelationAnalysis:
 
         # Define columns - modified for single subject
         columns = ("Post1_ID", "Post2_ID", "Student", "Subject", "Topics", "Correlation",
-                   "Time Gap", "Status")
+                   "Time Gap", "Status", "P-Value")
 
-        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=15)
+        self.tree = ttk.Treeview(tree_frame, columns=columns, show='headings', height=TREE_ROWS)
 
         # Define column headings and widths
         column_widths = {"Post1_ID": 80, "Post2_ID": 80, "Student": 80, "Subject": 100,
-                         "Topics": 250, "Correlation": 100, "Time Gap": 80, "Status": 80}
+                         "Topics": 250, "Correlation": 100, "Time Gap": 80, "Status": 100, "P-Value": 80}
 
         for col in columns:
-            self.tree.heading(col, text=col)
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_by_column(c))
             self.tree.column(col, width=column_widths.get(col, 100), anchor='center')
 
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.tree.yview)
+        # The vertical scrollbar moves an offset into the view; only the visible rows are rendered
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient='vertical', command=self.on_tree_scroll)
         h_scrollbar = ttk.Scrollbar(tree_frame, orient='horizontal', command=self.tree.xview)
 
-        self.tree.configure(yscrollcommand=v_scrollbar.set, xscrollcommand=h_scrollbar.set)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_rows(-1 if event.delta > 0 else 1))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_rows(-1))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_rows(1))
 
         # Pack scrollbars and treeview
         self.tree.pack(side='left', fill='both', expand=True)
-        v_scrollbar.pack(side='right', fill='y')
+        self.tree_scrollbar.pack(side='right', fill='y')
         h_scrollbar.pack(side='bottom', fill='x')
 
+    def create_gaps_view(self):
+        # Summary line and table of isolated topics / detached clusters
+        self.gaps_summary = tk.Label(self.gaps_frame, text="Run \"Find Gaps\" to analyze topic connectivity.",
+                                     bg='white', font=('Arial', 9, 'italic'), fg='#666')
+        self.gaps_summary.pack(anchor='w', pady=5)
+
+        columns = ("Subject", "Gap Type", "Topics", "Size")
+        self.gaps_tree = ttk.Treeview(self.gaps_frame, columns=columns, show='headings', height=12)
+
+        column_widths = {"Subject": 120, "Gap Type": 140, "Topics": 500, "Size": 60}
+        for col in columns:
+            self.gaps_tree.heading(col, text=col)
+            self.gaps_tree.column(col, width=column_widths.get(col, 100),
+                                  anchor='w' if col == "Topics" else 'center')
+
+        self.gaps_tree.pack(fill='both', expand=True, pady=5)
+
+    def create_statistics_view(self):
+        tk.Label(self.stats_frame, text="Running statistics per student and subject (rows passing the filter)",
+                 bg='white', font=('Arial', 9, 'italic'), fg='#666').pack(anchor='w', pady=5)
+
+        columns = ("Student", "Subject", "Count", "Mean", "Std Dev", "Min", "Max")
+        self.stats_tree = ttk.Treeview(self.stats_frame, columns=columns, show='headings', height=12)
+
+        for col in columns:
+            self.stats_tree.heading(col, text=col)
+            self.stats_tree.column(col, width=140 if col in ("Student", "Subject") else 90, anchor='center')
+
+        self.stats_tree.pack(fill='both', expand=True, pady=5)
+        self.stats_tree.bind('<<TreeviewSelect>>', self.on_statistics_select)
+
+    def create_histogram_view(self):
+        self.histogram_title = tk.Label(self.correlations_frame, text="Correlation histogram: all groups",
+                                        bg='white', font=('Arial', 10, 'bold'))
+        self.histogram_title.pack(anchor='w', pady=5)
+
+        self.histogram_canvas = tk.Canvas(self.correlations_frame, bg='white', height=320,
+                                          highlightthickness=0)
+        self.histogram_canvas.pack(fill='both', expand=True)
+
+        # Bars and labels are created once and moved on every refresh
+        self.histogram_bars = []
+        self.histogram_counts = []
+        for b in range(HISTOGRAM_BINS):
+            self.histogram_bars.append(self.histogram_canvas.create_rectangle(0, 0, 0, 0, fill='#ffcccc',
+                                                                              outline='#cc6666'))
+            self.histogram_counts.append(self.histogram_canvas.create_text(0, 0, text="",
+                                                                           font=('Arial', 8)))
+            self.histogram_canvas.create_text(60 + b * 70 + 30, 300, text=f"{b / HISTOGRAM_BINS:.1f}-"
+                                              f"{(b + 1) / HISTOGRAM_BINS:.1f}", font=('Arial', 8))
+
+    def add_to_statistics(self, index):
+        rows = self.store.rows[index]
+        self.statistics.add(rows["student"], rows["subject"], rows["correlation"])
+        self.refresh_statistics()
+
+    def remove_from_statistics(self, index):
+        rows = self.store.rows[index]
+        stale_min, stale_max = self.statistics.remove(rows["student"], rows["subject"], rows["correlation"])
+        if len(stale_min) or len(stale_max):
+            self._refresh_stale_extremes(stale_min, stale_max)
+        self.refresh_statistics()
+
+    def _refresh_stale_extremes(self, stale_min, stale_max):
+        # Walk the correlation-sorted order from the filter boundary (for minima) and
+        # from the top (for maxima) until every stale group has been seen again
+        order = self.store.correlation_order()
+        values = self.store.rows["correlation"]
+        start = np.searchsorted(values[order], np.float32(self.active_min_correlation or -np.inf))
+
+        for groups, positions, is_min in ((stale_min, order[start:], True),
+                                          (stale_max, order[start:][::-1], False)):
+            pending = set(groups.tolist())
+            for offset in range(0, len(positions), ORDER_SCAN_BLOCK):
+                if not pending:
+                    break
+                block = positions[offset:offset + ORDER_SCAN_BLOCK]
+                rows = self.store.rows[block]
+                block_groups = self.statistics.group_ids(rows["student"], rows["subject"])
+                found, first = np.unique(block_groups, return_index=True)
+                for group, position in zip(found.tolist(), first.tolist()):
+                    if group in pending:
+                        pending.discard(group)
+                        value = float(rows["correlation"][position])
+                        if is_min:
+                            self.statistics.set_extremes([group], minimum=value)
+                        else:
+                            self.statistics.set_extremes([group], maximum=value)
+
+    def refresh_statistics(self):
+        # Only groups touched since the last refresh are re-rendered
+        for group in self.statistics.pop_dirty():
+            student_code, subject_code = self.statistics.keys[group]
+            count = int(self.statistics.count[group])
+            iid = str(group)
+            if count == 0:
+                values = (self.store.students.decode(student_code), self.store.subjects.decode(subject_code),
+                          0, "--", "--", "--", "--")
+            else:
+                values = (self.store.students.decode(student_code), self.store.subjects.decode(subject_code),
+                          count, f"{self.statistics.mean[group]:.3f}",
+                          f"{np.sqrt(self.statistics.variance(group)):.3f}",
+                          f"{self.statistics.minimum[group]:.3f}", f"{self.statistics.maximum[group]:.3f}")
+            if self.stats_tree.exists(iid):
+                self.stats_tree.item(iid, values=values)
+            else:
+                self.stats_tree.insert('', 'end', iid=iid, values=values)
+
+        self.refresh_histogram()
+
+    def refresh_histogram(self):
+        if self.histogram_group is None:
+            counts = self.statistics.histogram[:len(self.statistics)].sum(axis=0)
+        else:
+            counts = self.statistics.histogram[self.histogram_group]
+
+        peak = max(int(counts.max()) if len(counts) else 0, 1)
+        for b, count in enumerate(counts.tolist()):
+            left = 60 + b * 70
+            top = 280 - 240 * count / peak
+            self.histogram_canvas.coords(self.histogram_bars[b], left, top, left + 60, 280)
+            self.histogram_canvas.coords(self.histogram_counts[b], left + 30, top - 10)
+            self.histogram_canvas.itemconfig(self.histogram_counts[b], text=str(count))
+
+    def on_statistics_select(self, event=None):
+        selection = self.stats_tree.selection()
+        if selection:
+            self.histogram_group = int(selection[0])
+            student_code, subject_code = self.statistics.keys[self.histogram_group]
+            self.histogram_title.config(text=f"Correlation histogram: {self.store.students.decode(student_code)}"
+                                             f" - {self.store.subjects.decode(subject_code)}")
+        else:
+            self.histogram_group = None
+            self.histogram_title.config(text="Correlation histogram: all groups")
+        self.refresh_histogram()
+
+    def reset_statistics(self):
+        self.statistics = RunningGroupStatistics()
+        self.histogram_group = None
+        self.histogram_title.config(text="Correlation histogram: all groups")
+        for item in self.stats_tree.get_children():
+            self.stats_tree.delete(item)
+        self.refresh_histogram()
+
     def populate_data(self):
-        # Clear existing data
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-
-        # Add filtered data
-        for row in self.filtered_data:
-            self.tree.insert('', 'end', values=(
-                row["Post1_ID"], row["Post2_ID"], row["Student"],
-                row["Subject"], row["Topics"], f"{row['Correlation']:.3f}",
-                row["Time_Gap"], row["Status"]
-            ))
+        """Rebuild the sorted view of the filtered rows and render the visible part"""
+        self.view_stale = False
+        if self.sort_column is None:
+            self.sorted_view = self.filtered_index
+        else:
+            order = self.store.sort_order(SORT_FIELDS[self.sort_column])
+            if len(self.filtered_index) == len(self.store):
+                self.sorted_view = order
+            else:
+                shown = np.zeros(len(self.store), dtype=bool)
+                shown[self.filtered_index] = True
+                self.sorted_view = order[shown[order]]
+        self.render_rows()
+
+    def sort_by_column(self, column):
+        # Clicking the sorted column again only flips the direction of the cached view
+        if column == self.sort_column:
+            self.sort_descending = not self.sort_descending
+        else:
+            if self.sort_column is not None:
+                self.tree.heading(self.sort_column, text=self.sort_column)
+            self.sort_column = column
+            self.sort_descending = False
+            self.populate_data()
+        self.tree.heading(column, text=f"{column} {'▼' if self.sort_descending else '▲'}")
+        self.tree_offset = 0
+        self.render_rows()
+
+    def render_rows(self):
+        """Reuse the Treeview items to show TREE_ROWS rows starting at tree_offset"""
+        view = self.sorted_view[::-1] if self.sort_descending else self.sorted_view
+        self.tree_offset = max(0, min(self.tree_offset, len(view) - TREE_ROWS))
+        visible = view[self.tree_offset:self.tree_offset + TREE_ROWS]
+
+        items = self.tree.get_children()
+        for position, index in enumerate(visible):
+            if position < len(items):
+                self.tree.item(items[position], values=self.store.row_values(index))
+            else:
+                self.tree.insert('', 'end', values=self.store.row_values(index))
+        if len(items) > len(visible):
+            self.tree.delete(*items[len(visible):])
+
+        total = max(len(view), 1)
+        self.tree_scrollbar.set(self.tree_offset / total, min(1.0, (self.tree_offset + TREE_ROWS) / total))
+
+    def scroll_rows(self, rows):
+        if self.view_stale:
+            self.populate_data()
+        self.tree_offset += rows
+        self.render_rows()
+
+    def on_tree_scroll(self, action, amount, unit=None):
+        if action == 'moveto':
+            if self.view_stale:
+                self.populate_data()
+            self.tree_offset = int(float(amount) * len(self.sorted_view))
+            self.render_rows()
+        else:
+            self.scroll_rows(int(amount) * (TREE_ROWS if unit == 'pages' else 1))
 
     def load_data(self):
-        messagebox.showinfo("Load Data", "Mathematics topic correlation data for Alice loaded successfully!")
+        if self.load_queue is not None:
+            messagebox.showwarning("Load Data", "A file is already loading.")
+            return
+
+        path = filedialog.askopenfilename(
+            title="Load Correlation Data",
+            filetypes=[("Correlation data", "*.csv *.jsonl *.json"), ("All files", "*.*")]
+        )
+        if path:
+            self.start_load(path)
+
+    def start_load(self, path):
+        # Start from an empty store; rows appear as chunks arrive
+        self.store = CorrelationStore()
+        self.group_similarity = None
+        self.filtered_index = np.arange(0)
+        self.tree_offset = 0
+        self.posts = PostCollection()
+        self.post_vectors = None
+        self.populate_data()
+        self.reset_statistics()
+
+        self.load_queue = queue.Queue(maxsize=16)
+        self.load_cancel = threading.Event()
+        self.load_thread = threading.Thread(target=self._load_worker,
+                                            args=(path, self.load_cancel, self.load_queue), daemon=True)
+        self.load_thread.start()
+
+        self.load_path = path
+        self.load_started = time.perf_counter()
+        self.load_progress['value'] = 0
+        self.load_data_btn.config(state='disabled')
+        self.partition_box.config(state='disabled')
+        self.cancel_load_btn.config(state='normal')
+        self.load_status.config(text=f"Loading {os.path.basename(path)}...")
+        self.root.after(LOAD_POLL_MS, self._drain_load_queue)
+
+    def open_batch_results(self):
+        path = filedialog.askopenfilename(title="Open Batch Results",
+                                          filetypes=[("Batch manifest", BATCH_MANIFEST), ("All files", "*.*")])
+        if not path:
+            return
+        try:
+            with open(path, encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Open Batch Results", f"Could not read manifest: {e}")
+            return
+
+        # Only the manifest is read here; partition files are loaded when selected
+        self.batch_dir = os.path.dirname(path)
+        self.batch_partitions = manifest.get("Partitions", [])
+        self.partition_box['values'] = [
+            f"{entry['Student']} | {entry['Subject']} ({entry['Rows']} correlations, "
+            f"{entry['Isolated']} isolated, {entry['Clusters']} clusters)"
+            for entry in self.batch_partitions
+        ]
+        self.partition_var.set("")
+        messagebox.showinfo("Open Batch Results", f"{len(self.batch_partitions)} student/subject partitions found.")
+
+    def on_partition_selected(self, event=None):
+        if self.load_queue is not None:
+            messagebox.showwarning("Load Data", "A file is already loading.")
+            return
+        index = self.partition_box.current()
+        if 0 <= index < len(self.batch_partitions):
+            self.start_load(os.path.join(self.batch_dir, self.batch_partitions[index]["File"]))
+
+    def update_subject_info(self):
+        students = np.unique(self.store.rows["student"])
+        subjects = np.unique(self.store.rows["subject"])
+        if len(students) == 1 and len(subjects) == 1:
+            text = (f"Subject: {self.store.subjects.decode(subjects[0])} | "
+                    f"Student: {self.store.students.decode(students[0])}")
+        else:
+            text = f"Subjects: {len(subjects)} | Students: {len(students)}"
+        self.subject_info.config(text=text)
+
+    def cancel_load(self):
+        if self.load_cancel is not None:
+            self.load_cancel.set()
+            self.load_status.config(text="Cancelling...")
+
+    @staticmethod
+    def _load_worker(path, cancel_event, load_queue):
+        # Runs off the Tk thread: parse only, never touch widgets
+        try:
+            for rows, progress in iter_row_chunks(path, cancel_event=cancel_event):
+                if "Text" in rows[0]:
+                    load_queue.put(("posts", parse_post_rows(rows), progress))
+                else:
+                    load_queue.put(("rows", parse_correlation_rows(rows), progress))
+            load_queue.put(("cancelled" if cancel_event.is_set() else "done", None, 1.0))
+        except Exception as e:
+            # Every failure must reach the queue, or the Tk side would keep polling forever
+            load_queue.put(("error", str(e) or type(e).__name__, None))
+
+    def _drain_load_queue(self):
+        # Apply as many chunks as fit in one tick, then yield back to the event loop
+        deadline = time.perf_counter() + LOAD_TICK_SECONDS
+        while time.perf_counter() < deadline:
+            try:
+                kind, payload, progress = self.load_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            if kind == "posts":
+                self.posts.append_columns(payload)
+                self.load_status.config(text=f"Loaded {len(self.posts):,} posts ({progress:.0%})")
+            elif kind == "rows":
+                self._show_loaded_rows(self.store.append_columns(payload))
+                self.load_status.config(text=f"Loaded {len(self.store):,} rows ({progress:.0%})")
+            else:
+                self._finish_load(kind, payload)
+                return
+            self.load_progress['value'] = progress * 100
+
+        # Render once per tick. Re-sorting the whole store for every chunk would stall large loads,
+        # so a sorted table that is already full waits for the load to finish or the user to scroll
+        if self.view_stale and (self.sort_column is None or len(self.sorted_view) < TREE_ROWS):
+            self.populate_data()
+        self.root.after(LOAD_POLL_MS, self._drain_load_queue)
+
+    def _show_loaded_rows(self, rows_slice):
+        new_index = np.arange(rows_slice.start, rows_slice.stop)
+        if self.active_min_correlation is not None:
+            mask = self.store.rows["correlation"][rows_slice] >= np.float32(self.active_min_correlation)
+            new_index = new_index[mask]
+
+        self.filtered_index = np.concatenate([self.filtered_index, new_index])
+        self.view_stale = True
+        self.add_to_statistics(new_index)
+
+    def _finish_load(self, kind, error):
+        self.load_queue = None
+        if self.view_stale:
+            self.populate_data()
+        self.load_data_btn.config(state='normal')
+        self.partition_box.config(state='readonly')
+        self.cancel_load_btn.config(state='disabled')
+        self.update_subject_info()
+        elapsed = time.perf_counter() - self.load_started
+        name = os.path.basename(self.load_path)
+
+        if kind == "error":
+            self.load_status.config(text=f"Load failed after {len(self.store):,} rows")
+            messagebox.showerror("Load Data", f"Could not load {name}: {error}")
+        elif kind == "cancelled":
+            self.load_status.config(text=f"Cancelled - kept {len(self.store):,} rows, {len(self.posts):,} posts")
+        elif len(self.posts):
+            self.load_progress['value'] = 100
+            self.load_status.config(text=f"Loaded {len(self.posts):,} posts in {elapsed:.1f}s")
+            messagebox.showinfo("Load Data", f"{len(self.posts):,} posts loaded from {name}.\n"
+                                             f"Run Analyze Correlations to correlate them.")
+        else:
+            self.load_progress['value'] = 100
+            self.load_status.config(text=f"Loaded {len(self.store):,} rows in {elapsed:.1f}s")
+            messagebox.showinfo("Load Data", f"{len(self.store):,} correlation rows loaded from {name}.")
+
+    def replace_store(self, store, group_similarity=None):
+        """Show a freshly computed set of correlation rows"""
+        self.store = store
+        self.group_similarity = group_similarity
+        if self.active_min_correlation is None:
+            self.filtered_index = np.arange(len(store))
+        else:
+            self.filtered_index = np.flatnonzero(store.correlation_mask(self.active_min_correlation))
+        self.tree_offset = 0
         self.populate_data()
+        self.reset_statistics()
+        self.add_to_statistics(self.filtered_index)
+        self.update_subject_info()
+
+    def correlate_posts(self, threshold, time_window):
+        """Run the correlation engine over the loaded posts and return a summary message"""
+        if self.topk_mode.get():
+            if self.post_vectors is None or len(self.post_vectors) != len(self.posts):
+                self.post_vectors = PostVectors.fit(self.posts.texts)
+            k = int(self.topk_entry.get())
+            rows_a, rows_b, corr = approximate_top_pairs(self.post_vectors, k)
+            store = CorrelationStore(capacity=max(len(corr), 1))
+            store.append_columns(self.posts.pair_columns(rows_a, rows_b, corr, "Top-k"))
+            self.replace_store(store)
+            return f"Found the top {len(corr)} post correlations"
+
+        # Exact mode goes through the on-disk cache so only new or edited posts are correlated
+        cache = self.open_correlation_cache()
+        summary = cache.update(self.posts)
+        columns = cache.pair_columns(threshold, time_window, post_ids=self.posts.post_id)
+        store = CorrelationStore(capacity=max(len(columns["correlation"]), 1))
+        store.append_columns(columns)
+        self.replace_store(store, cache.group_similarity)
+        return (f"Found {len(store)} post correlations above {threshold:.2f}\n"
+                f"({summary['new'] + summary['changed']} new or changed posts correlated)")
+
+    def open_correlation_cache(self):
+        path = correlation_cache_path(self.load_path)
+        if self.correlation_cache is None or self.correlation_cache.path != path:
+            if self.correlation_cache is not None:
+                self.correlation_cache.close()
+            self.correlation_cache = CorrelationCache(path)
+        return self.correlation_cache
 
     def analyze_correlations(self):
+        try:
+            threshold = float(self.correlation_threshold.get())
+            time_window = int(self.time_window.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid correlation threshold and time window.")
+            return
+
+        if len(self.posts):
+            try:
+                message = self.correlate_posts(threshold, time_window)
+            except ValueError:
+                messagebox.showerror("Error", "Please enter a valid number of top correlations.")
+                return
+            except sqlite3.Error as e:
+                messagebox.showerror("Error", f"Could not update the correlation cache: {e}")
+                return
+        else:
+            # Count correlations at or above the threshold per subject
+            subject_stats = self.store.group_statistics(by=("subject",),
+                                                        mask=self.store.correlation_mask(threshold))
+            found = sum(stats["Count"] for stats in subject_stats)
+            subjects = ", ".join(stats["Subject"] for stats in subject_stats) or "the loaded data"
+            message = f"Found {found} topic correlations in {subjects}"
+
         # Show analysis complete dialog
         dialog = tk.Toplevel(self.root)
         dialog.title("Analysis Complete")
@@ -190,7 +2092,7 @@ class PostCorrelationAnalysis:
                               fg='#0066cc', bg='white')
         icon_label.pack(pady=10)
 
-        message_label = tk.Label(info_frame, text="Found 6 topic correlations in Mathematics",
+        message_label = tk.Label(info_frame, text=message,
                                  font=('Arial', 11), bg='white')
         message_label.pack(pady=5)
 
@@ -199,21 +2101,145 @@ class PostCorrelationAnalysis:
         ok_button.pack(pady=10)
 
     def find_gaps(self):
-        messagebox.showinfo("Find Gaps", "Topic correlation gap analysis completed for Mathematics!")
+        try:
+            threshold = float(self.correlation_threshold.get())
+            time_window = int(self.time_window.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid correlation threshold and time window.")
+            return
+
+        gaps = find_topic_gaps(self.store, threshold, time_window)
+
+        for item in self.gaps_tree.get_children():
+            self.gaps_tree.delete(item)
+
+        isolated_count = 0
+        cluster_count = 0
+        for gap in gaps:
+            for topic in gap["Isolated"]:
+                self.gaps_tree.insert('', 'end', values=(gap["Subject"], "Isolated Topic", topic, 1))
+                isolated_count += 1
+            for cluster in gap["Clusters"]:
+                self.gaps_tree.insert('', 'end', values=(gap["Subject"], "Detached Cluster",
+                                                         ", ".join(cluster), len(cluster)))
+                cluster_count += 1
+
+        summary = (f"Threshold {threshold:.2f}, window {time_window} days: "
+                   f"{isolated_count} isolated topics, {cluster_count} detached clusters")
+        self.gaps_summary.config(text=summary)
+        self.notebook.select(self.gaps_frame)
+
+        if isolated_count or cluster_count:
+            messagebox.showinfo("Find Gaps", f"Topic correlation gap analysis completed.\n{summary}")
+        else:
+            messagebox.showinfo("Find Gaps", "No correlation gaps found - all topics are connected.")
+
+    def test_significance(self):
+        try:
+            alpha = float(self.significance_alpha.get())
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid significance level.")
+            return
+
+        rows = self.store.rows
+        rows["p_value"] = permutation_pvalues(self.store, group_similarity=self.group_similarity)
+        significant = rows["p_value"] <= alpha
+        codes = self.store.statuses.encode(["Significant", "Not Significant"])
+        rows["status"] = np.where(significant, codes[0], codes[1])
+        self.store.invalidate_orders("p_value", "status")
+        self.populate_data()
+
+        message = (f"{int(significant.sum())} of {len(rows)} correlations are significant "
+                   f"at the {alpha:g} level ({PERMUTATIONS} permutations per pair).")
+        if self.group_similarity is None:
+            # Loaded rows and batch partitions only hold the pairs that passed their threshold
+            messagebox.showwarning("Significance Test",
+                                   f"{message}\n\nThe null was drawn from the loaded correlations only. If they "
+                                   f"were filtered by a threshold, the p-values are too large; load the posts "
+                                   f"and run Analyze Correlations for an exact test.")
+        else:
+            messagebox.showinfo("Significance Test", message)
+
+    def update_filter_statistics(self, old_min, new_min):
+        """Add or remove only the rows whose correlation lies between the old and new thresholds"""
+        order = self.store.correlation_order()
+        sorted_values = self.store.rows["correlation"][order]
+        old_pos = 0 if old_min is None else np.searchsorted(sorted_values, np.float32(old_min))
+        new_pos = np.searchsorted(sorted_values, np.float32(new_min))
+
+        self.active_min_correlation = new_min
+        if new_pos > old_pos:
+            self.remove_from_statistics(order[old_pos:new_pos])
+        elif new_pos < old_pos:
+            self.add_to_statistics(order[new_pos:old_pos])
 
     def apply_filter(self):
         try:
             min_corr = float(self.min_correlation.get())
-            self.filtered_data = [row for row in self.sample_data
-                                  if row["Correlation"] >= min_corr]
+            self.update_filter_statistics(self.active_min_correlation, min_corr)
+            self.filtered_index = np.flatnonzero(self.store.correlation_mask(min_corr))
+            self.tree_offset = 0
             self.populate_data()
             messagebox.showinfo("Filter Applied",
-                                f"Filter applied. Showing {len(self.filtered_data)} topic correlations.")
+                                f"Filter applied. Showing {len(self.filtered_index)} topic correlations.")
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid correlation threshold.")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Student post correlation analysis")
+    parser.add_argument("--batch", metavar="POSTS_FILE",
+                        help="analyze every student/subject in a CSV/JSONL posts file without the GUI")
+    parser.add_argument("--output", default="correlation_batch", help="directory for batch results")
+    parser.add_argument("--threshold", type=float, default=0.5, help="minimum correlation to keep")
+    parser.add_argument("--time-window", type=int, default=7, help="maximum day gap between posts")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rebuild-cache", metavar="POSTS_FILE",
+                        help="add a posts file to its correlation cache and recompute every cached pair "
+                             "against the current document frequencies")
+    parser.add_argument("--topk-recall", metavar="POSTS_FILE",
+                        help="report top-k recall of the approximate search on a sample of a posts file")
+    parser.add_argument("--k", type=int, default=200, help="number of top pairs for --topk-recall")
+    parser.add_argument("--sample-size", type=int, default=2000, help="posts sampled for --topk-recall")
+    parser.add_argument("--tables", type=int, default=LSH_TABLES, help="LSH hash tables for --topk-recall")
+    parser.add_argument("--probes", type=int, default=LSH_PROBES,
+                        help="extra buckets probed per post and table for --topk-recall")
+    args = parser.parse_args()
+
+    if args.rebuild_cache:
+        started = time.perf_counter()
+        posts = PostCollection()
+        for rows, _ in iter_row_chunks(args.rebuild_cache):
+            posts.append_rows(rows)
+        cache = CorrelationCache(correlation_cache_path(args.rebuild_cache))
+        try:
+            cache.update(posts)
+            cache.rebuild()
+            pairs = cache.connection.execute("SELECT COUNT(*) FROM pairs").fetchone()[0]
+        finally:
+            cache.close()
+        print(f"Rebuilt {pairs} correlations for {len(posts)} posts in {time.perf_counter() - started:.1f}s "
+              f"-> {cache.path}")
+        return
+
+    if args.topk_recall:
+        posts = PostCollection()
+        for rows, _ in iter_row_chunks(args.topk_recall):
+            posts.append_rows(rows)
+        result = measure_topk_recall(PostVectors.fit(posts.texts), args.k, args.sample_size,
+                                     n_tables=args.tables, n_probes=args.probes)
+        print(f"Top-{result['k']} recall on {result['sample_size']} posts: {result['recall']:.3f} "
+              f"(exact {result['exact_seconds']:.2f}s, approximate {result['approximate_seconds']:.2f}s, "
+              f"{args.tables} tables, {args.probes} probes)")
+        return
+
+    if args.batch:
+        started = time.perf_counter()
+        entries = run_batch_analysis(args.batch, args.output, args.threshold, args.time_window, args.workers)
+        print(f"Analyzed {len(entries)} partitions, {sum(entry['Rows'] for entry in entries)} correlations "
+              f"in {time.perf_counter() - started:.1f}s -> {os.path.join(args.output, BATCH_MANIFEST)}")
+        return
+
     root = tk.Tk()
     app = PostCorrelationAnalysis(root)
     root.mainloop()
@@ -1,18 +1,1078 @@
 import tkinter as tk
 from tkinter import ttk
-import math
 from tkinter import messagebox
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import argparse
+import copy
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import random
 import pandas as pd
 from matplotlib.figure import Figure
 
 
+# State space dimensions
+ATTEMPTS_RANGE = np.arange(1, 11)  # 1-10 attempts
+CONTENT_MATCH_RANGE = np.array([0, 25, 50, 75, 100])  # Content match percentages
+TIME_SLOTS_RANGE = np.arange(1, 11)  # 1-10 time slots
+STATE_SHAPE = (len(ATTEMPTS_RANGE), len(CONTENT_MATCH_RANGE), len(TIME_SLOTS_RANGE))
+
+# Action space: Study strategies
+ACTIONS = [
+    "Visual Imagery",  # Focus on visual associations
+    "Spaced Repetition",  # Distributed practice over time
+    "Active Recall",  # Test yourself repeatedly
+    "Chunking",  # Group information
+    "Mnemonic Devices"  # Memory aids like acronyms
+]
+
+# Experience replay settings
+REPLAY_CAPACITY = 10000
+REPLAY_EPOCHS = 1
+REPLAY_BATCH_SIZE = 32
+PRIORITY_EXPONENT = 0.6
+PRIORITY_EPSILON = 1e-3
+PRIORITY_CORRECTION = 1.0  # Importance-sampling exponent (beta); 1 fully undoes the prioritized sampling bias
+
+# Saved model: the .npz beside this script is loaded at startup and written on close
+MODEL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "memorizing_qlearning.npz")
+MODEL_FORMAT_VERSION = 2  # 2 added next states and terminal flags to the replay buffer
+MEMMAP_THRESHOLD = 64 * 1024 * 1024  # Q-tables larger than this are saved as a separate .npy
+LEARNER_CAPACITY = 16  # Learner rows allocated when the per-learner store is created; doubled when full
+LEARNER_COPY_ROWS = 4096  # Learner rows copied at a time when the store grows
+
+# Background training
+TRAINING_POLL_MS = 100  # How often the window checks the training thread for progress
+
+# Score breakdown pie chart; redraws are coalesced over BREAKDOWN_DEBOUNCE_MS
+BREAKDOWN_LABELS = ['Content Match (50%)', 'Attempts (30%)', 'Time Efficiency (20%)']
+BREAKDOWN_EXPLODE = (0.1, 0, 0)
+BREAKDOWN_DEBOUNCE_MS = 100
+
+# Bulk scoring: input columns and rows per CSV chunk
+SCORE_COLUMNS = ("attempts", "content_match", "time_slots", "max_slots")
+SCORE_CHUNK_SIZE = 100000
+
+# Learner simulator settings
+EPISODE_LENGTH = 5  # Memorizing sessions per simulated learner
+SIMULATED_LEARNERS = 4096  # Learners simulated side by side per batch
+SIMULATED_EPISODES = 200000  # Episodes run by "Train on Simulated Learners"
+# Average effect of each strategy and how it changes with learner ability
+STRATEGY_EFFECT = np.array([0.02, 0.08, 0.10, 0.04, 0.06])
+STRATEGY_ABILITY_SLOPE = np.array([-0.10, 0.05, 0.25, -0.20, -0.30])
+
+# Widened state space used to exercise the sparse Q store: attempts, content match %, time slots, max slots
+FINE_STATE_SHAPE = (20, 101, 20, 20)
+
+# Tile coding function approximation: tilings x (attempts, content match, time used) grid
+TILINGS = 8
+TILES_PER_DIMENSION = 8
+TILE_MEMORY = 4096  # Hashed weight rows shared by all tilings
+TILE_SCALES = np.array([1 / 10, 1 / 100, 1.0])  # Raw values to [0, 1]: attempts, content match, time fraction
+
+# Eligibility traces
+TRACE_LAMBDA = 0.5
+CONVERGENCE_CHECKPOINTS = [1000, 2000, 5000, 10000, 20000, 50000]
+CONVERGENCE_LEARNERS = 250  # Small batches so the benchmark measures episodes, not batch size
+
+# Hyperparameter sweep defaults
+SWEEP_ALPHAS = [0.05, 0.1, 0.2, 0.4]
+SWEEP_GAMMAS = [0.0, 0.5, 0.9, 0.99]
+SWEEP_EPSILONS = [0.05, 0.1, 0.3, 0.5]
+SWEEP_EPISODES = 200000
+SWEEP_EVAL_EPISODES = 50000
+SWEEP_EPOCHS = 5  # Replay epochs per configuration on recorded data
+HOLD_OUT_FRACTION = 0.2
+
+
+def compute_memorizing_score(attempts, content_match, time_slots, max_slots):
+    """
+    Memorizing score of each record, as shown in "Score Results".
+
+    Works on scalars or arrays and returns the final score together with the
+    content, attempt and time efficiency component scores and their weighted
+    contributions (the breakdown).
+    """
+    attempts = np.asarray(attempts, dtype=float)
+    content_score = np.asarray(content_match, dtype=float)
+    time_slots = np.asarray(time_slots, dtype=float)
+    max_slots = np.asarray(max_slots, dtype=float)
+
+    attempt_score = 100 * np.exp(-0.5 * (attempts - 1))
+    time_efficiency = np.maximum(0, 100 * (1 - (time_slots / max_slots)))
+    content_contribution = 0.5 * content_score
+    attempt_contribution = 0.3 * attempt_score
+    time_contribution = 0.2 * time_efficiency
+    final_score = content_contribution + attempt_contribution + time_contribution
+    return {"final_score": final_score, "content_score": content_score,
+            "attempt_score": attempt_score, "time_efficiency": time_efficiency,
+            "content_contribution": content_contribution, "attempt_contribution": attempt_contribution,
+            "time_contribution": time_contribution}
+
+
+def score_records(records):
+    """
+    Score a DataFrame of attempts, content_match, time_slots and max_slots records.
+
+    Returns a copy with the score and breakdown columns added. Every row is
+    validated with vectorized masks; invalid rows get NaN scores and the
+    reason in the "error" column.
+    """
+    attempts, content_match, time_slots, max_slots = (
+        pd.to_numeric(records[column], errors='coerce').to_numpy(dtype=float) for column in SCORE_COLUMNS)
+    checks = [
+        (np.isnan(attempts) | np.isnan(content_match) | np.isnan(time_slots) | np.isnan(max_slots),
+         "missing or non-numeric value"),
+        (attempts < 1, "attempts must be at least 1"),
+        ((content_match < 0) | (content_match > 100), "content_match must be between 0 and 100"),
+        ((time_slots < 1) | (max_slots < 1), "time slots must be positive"),
+        (time_slots > max_slots, "Time slots used cannot exceed maximum time slots."),
+    ]
+    # Apply in reverse so each row reports the first check it fails
+    errors = np.full(len(records), "", dtype=object)
+    for mask, message in reversed(checks):
+        errors[mask] = message
+    valid = errors == ""
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scores = compute_memorizing_score(attempts, content_match, time_slots, max_slots)
+    scored = records.copy()
+    for column, values in scores.items():
+        scored[column] = np.where(valid, values, np.nan)
+    scored["error"] = errors
+    return scored
+
+
+def score_csv(input_path, output_path, chunk_size=SCORE_CHUNK_SIZE):
+    """Score a CSV file chunk by chunk; returns the number of rows and of invalid rows"""
+    rows = invalid = 0
+    for number, chunk in enumerate(pd.read_csv(input_path, chunksize=chunk_size)):
+        scored = score_records(chunk)
+        scored.to_csv(output_path, mode='w' if number == 0 else 'a', header=number == 0, index=False)
+        rows += len(scored)
+        invalid += int((scored["error"] != "").sum())
+    return rows, invalid
+
+
+def content_bins(content_match):
+    """Index of the closest content match bin for each value (ties go to the lower bin)"""
+    midpoints = (CONTENT_MATCH_RANGE[1:] + CONTENT_MATCH_RANGE[:-1]) / 2
+    return np.searchsorted(midpoints, content_match, side='left')
+
+
+def state_index(attempts, content_match, time_slots):
+    """
+    Map raw (attempts, content match, time slots) values to flat Q-table rows.
+
+    Returns the row indices and a mask of the states that lie inside the grid;
+    rows for states outside it are clipped and should not be trained on.
+    """
+    attempts = np.asarray(attempts)
+    time_slots = np.asarray(time_slots)
+    valid = ((attempts >= ATTEMPTS_RANGE[0]) & (attempts <= ATTEMPTS_RANGE[-1]) &
+             (time_slots >= TIME_SLOTS_RANGE[0]) & (time_slots <= TIME_SLOTS_RANGE[-1]))
+    index = (np.clip(attempts - ATTEMPTS_RANGE[0], 0, STATE_SHAPE[0] - 1),
+             content_bins(content_match),
+             np.clip(time_slots - TIME_SLOTS_RANGE[0], 0, STATE_SHAPE[2] - 1))
+    return np.ravel_multi_index(index, STATE_SHAPE), valid
+
+
+class QTable:
+    """
+    Dense Q-values: one row per flat state index, one column per action.
+
+    The sum and count of trained (positive) entries per action are kept up to
+    date by every update, so per-action averages cost O(actions). So is the
+    greedy policy (best action and its value per state): only the states whose
+    Q-values changed are re-maximized, and best() is a single array lookup.
+    """
+
+    def __init__(self, n_states=int(np.prod(STATE_SHAPE)), n_actions=len(ACTIONS), alpha=0.1, gamma=0.9):
+        self.alpha = alpha  # Learning rate
+        self.gamma = gamma  # Discount factor
+        self.set_values(np.zeros((n_states, n_actions)))
+
+    def set_values(self, values):
+        """Replace the Q-values, e.g. with a loaded table, and recount the trained entries"""
+        self.values = values
+        trained = values > 0
+        self.trained_count = trained.sum(axis=0)
+        self.trained_sum = np.where(trained, values, 0).sum(axis=0)
+        self.greedy_action = values.argmax(axis=1)
+        self.greedy_value = values[np.arange(len(values)), self.greedy_action]
+
+    @property
+    def n_actions(self):
+        return self.values.shape[1]
+
+    def copy(self):
+        """Independent copy to train while this table keeps serving lookups"""
+        clone = copy.copy(self)
+        for name, value in vars(self).items():
+            if isinstance(value, np.ndarray):
+                setattr(clone, name, np.array(value))
+        return clone
+
+    def encode(self, observation):
+        """Rows and in-grid mask for raw (attempts, content match, time slots, ...) arrays"""
+        return state_index(*observation[:3])
+
+    def rows(self, states, insert=False):
+        """Rows of self.values holding the given states; every state has a row in the dense table"""
+        return states
+
+    def q(self, states, actions):
+        return self.values[self.rows(states), actions]
+
+    def memory_report(self):
+        """Visited (non-zero) states and bytes held by the Q-values and the cached policy"""
+        return {"visited_states": int(np.count_nonzero(self.values.any(axis=1))),
+                "allocated_rows": len(self.values),
+                "resident_bytes": self.values.nbytes + self.greedy_action.nbytes + self.greedy_value.nbytes}
+
+    def update(self, states, actions, rewards, next_states=None, done=False, weights=None):
+        """
+        One batched Q-learning step and the TD errors it applied.
+
+        Without explicit transitions the next state is the state itself; done
+        marks terminal transitions, which do not bootstrap. A state-action pair
+        that appears several times in the batch moves by the mean of its TD
+        errors, so a batch of one is the classic update. Optional per-sample
+        weights, such as importance-sampling weights, scale the TD errors; they
+        are capped at 1 / alpha so that no step moves past its target.
+        """
+        states = np.atleast_1d(states)
+        actions = np.atleast_1d(actions)
+        next_states = states if next_states is None else np.atleast_1d(next_states)
+
+        rows = self.rows(states, insert=True)
+        best_next_q = np.where(done, 0, self.greedy_value[self.rows(next_states)])
+        td_errors = rewards + self.gamma * best_next_q - self.values[rows, actions]
+        steps = td_errors if weights is None else np.minimum(weights, 1 / self.alpha) * td_errors
+        self._adjust_rows(rows, actions, steps)
+        return td_errors
+
+    def adjust(self, states, actions, deltas):
+        """Move each state-action entry by alpha times the mean of its deltas"""
+        self._adjust_rows(self.rows(states, insert=True), actions, deltas)
+
+    def _adjust_rows(self, rows, actions, deltas):
+        pairs, inverse = np.unique(rows * self.n_actions + actions, return_inverse=True)
+        mean_delta = np.bincount(inverse, deltas) / np.bincount(inverse)
+        flat = self.values.reshape(-1)
+        old = flat[pairs]
+        new = old + self.alpha * mean_delta
+        flat[pairs] = new
+
+        # Move the changed entries' contributions in the per-action aggregates
+        pair_actions = pairs % self.n_actions
+        self.trained_sum += (np.bincount(pair_actions, np.where(new > 0, new, 0), self.n_actions) -
+                             np.bincount(pair_actions, np.where(old > 0, old, 0), self.n_actions))
+        self.trained_count += (np.bincount(pair_actions[new > 0], minlength=self.n_actions) -
+                               np.bincount(pair_actions[old > 0], minlength=self.n_actions))
+
+        # Refresh the greedy policy of the changed states only
+        changed = np.unique(pairs // self.n_actions)
+        self.greedy_action[changed] = self.values[changed].argmax(axis=1)
+        self.greedy_value[changed] = self.values[changed, self.greedy_action[changed]]
+
+    def best(self, states):
+        """Greedy action and its Q-value for each state, from the cached policy"""
+        rows = self.rows(states)
+        return self.greedy_action[rows], self.greedy_value[rows]
+
+    def action_means(self):
+        """Average Q-value per action over trained (positive) entries"""
+        counts = self.trained_count
+        return np.divide(self.trained_sum, counts, out=np.zeros(self.n_actions), where=counts > 0)
+
+
+class SparseQTable(QTable):
+    """
+    Q-table that allocates a row on a state's first update.
+
+    States are non-negative packed integer keys, e.g. np.ravel_multi_index over
+    a widened state space, turned into observations by an optional encoder.
+    An open-addressing hash table (linear probing) maps keys to rows of a
+    growable row pool. Row 0 stays all zero and stands in for every unvisited
+    state, so lookups never allocate; only updates do.
+    """
+
+    def __init__(self, n_actions=len(ACTIONS), alpha=0.1, gamma=0.9, encoder=None, capacity=1024):
+        self.encoder = encoder
+        self.hash_keys = np.full(2 * capacity, -1, dtype=np.int64)
+        self.hash_rows = np.zeros(2 * capacity, dtype=np.int64)
+        self.row_keys = np.full(capacity, -1, dtype=np.int64)
+        self.n_rows = 1
+        super().__init__(n_states=capacity, n_actions=n_actions, alpha=alpha, gamma=gamma)
+
+    def encode(self, observation):
+        return super().encode(observation) if self.encoder is None else self.encoder(observation)
+
+    def rows(self, states, insert=False):
+        keys, inverse = np.unique(np.asarray(states, dtype=np.int64), return_inverse=True)
+        if insert:
+            self._reserve(len(keys))
+        return self._probe(keys, insert)[inverse].reshape(np.shape(states))
+
+    def _slots(self, keys):
+        # Fibonacci hashing into the top bits
+        shift = np.uint64(64 - (len(self.hash_keys).bit_length() - 1))
+        return ((keys.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)) >> shift).astype(np.int64)
+
+    def _probe(self, keys, insert, new_rows=None):
+        """Rows of unique keys, claiming empty slots (and new rows unless given) when inserting"""
+        rows = np.zeros(len(keys), dtype=np.int64)
+        slots = self._slots(keys)
+        mask = len(self.hash_keys) - 1
+        pending = np.arange(len(keys))
+        while len(pending):
+            slot_keys = self.hash_keys[slots[pending]]
+            hit = slot_keys == keys[pending]
+            rows[pending[hit]] = self.hash_rows[slots[pending[hit]]]
+            empty = slot_keys == -1
+            done = hit | (empty & (not insert))
+
+            if insert and empty.any():
+                # One key claims each empty slot; the others look at it again next round
+                claimed, first = np.unique(slots[pending[empty]], return_index=True)
+                claimers = pending[empty][first]
+                if new_rows is None:
+                    ids = np.arange(self.n_rows, self.n_rows + len(claimers))
+                    self.row_keys[ids] = keys[claimers]
+                    self.n_rows += len(claimers)
+                else:
+                    ids = new_rows[claimers]
+                self.hash_keys[claimed] = keys[claimers]
+                self.hash_rows[claimed] = ids
+                rows[claimers] = ids
+                done[np.flatnonzero(empty)[first]] = True
+
+            advance = pending[~hit & ~empty]
+            slots[advance] = (slots[advance] + 1) & mask
+            pending = pending[~done]
+        return rows
+
+    def _reserve(self, extra):
+        needed = self.n_rows + extra
+        if needed > len(self.values):
+            grown = max(needed, 2 * len(self.values))
+            added = grown - len(self.values)
+            self.values = np.concatenate([self.values, np.zeros((added, self.n_actions))])
+            self.greedy_action = np.concatenate([self.greedy_action, np.zeros(added, dtype=self.greedy_action.dtype)])
+            self.greedy_value = np.concatenate([self.greedy_value, np.zeros(added)])
+            self.row_keys = np.concatenate([self.row_keys, np.full(added, -1, dtype=np.int64)])
+        if 2 * needed > len(self.hash_keys):
+            # Rehash into a table at most a quarter full
+            size = 1 << (4 * needed - 1).bit_length()
+            self.hash_keys = np.full(size, -1, dtype=np.int64)
+            self.hash_rows = np.zeros(size, dtype=np.int64)
+            self._probe(self.row_keys[1:self.n_rows], True, new_rows=np.arange(1, self.n_rows))
+
+    def memory_report(self):
+        """Visited states, allocated rows and bytes held by the rows, cached policy and hash table"""
+        arrays = (self.values, self.greedy_action, self.greedy_value, self.hash_keys, self.hash_rows, self.row_keys)
+        return {"visited_states": self.n_rows - 1, "allocated_rows": len(self.values),
+                "resident_bytes": sum(array.nbytes for array in arrays)}
+
+
+def fine_state_keys(observation):
+    """Packed FINE_STATE_SHAPE keys (1% content match bins, up to 20 attempts and slots) for SparseQTable"""
+    attempts, content_match, time_slots, max_slots = observation
+    index = (np.clip(attempts - 1, 0, FINE_STATE_SHAPE[0] - 1),
+             np.clip(content_match, 0, FINE_STATE_SHAPE[1] - 1),
+             np.clip(time_slots - 1, 0, FINE_STATE_SHAPE[2] - 1),
+             np.clip(np.broadcast_to(max_slots, np.shape(attempts)) - 1, 0, FINE_STATE_SHAPE[3] - 1))
+    return np.ravel_multi_index(index, FINE_STATE_SHAPE), np.ones(len(attempts), dtype=bool)
+
+
+def recommend_strategies(q_table, attempts, content_match, time_slots):
+    """
+    Recommended strategy for every learner of a class in one call.
+
+    Takes arrays of raw slider values and returns the best action index and
+    its Q-value per learner, plus a mask of the learners whose state lies
+    inside the Q-table grid. A Q-value of zero or less means the state has not
+    been trained yet.
+    """
+    states, valid = state_index(attempts, content_match, time_slots)
+    actions, q_values = q_table.best(states)
+    return actions, q_values, valid
+
+
+def recommendation_labels(actions, q_values, valid):
+    """Text shown for each recommendation, as in "Recommended Strategy" """
+    labels = np.array(ACTIONS, dtype=object)[actions]
+    labels[q_values <= 0] = "Explore different strategies"
+    labels[~valid] = "Try any strategy and provide feedback"
+    return labels
+
+
+class TileCodingQ:
+    """
+    Linear Q-function over hashed tile-coding features.
+
+    Attempts, content match and the fraction of the available time slots used
+    are continuous inputs, covered by TILINGS offset grids. Each tile is hashed
+    into a fixed TILE_MEMORY x actions weight array, so memory stays constant
+    whatever the slot counts or content values, and nearby states share
+    weights. Mirrors the QTable interface (encode, update, best).
+    """
+
+    def __init__(self, n_actions=len(ACTIONS), alpha=0.1, gamma=0.9, tilings=TILINGS,
+                 tiles=TILES_PER_DIMENSION, memory=TILE_MEMORY):
+        self.weights = np.zeros((memory, n_actions))
+        self.alpha = alpha  # Learning rate, shared across the active tiles
+        self.gamma = gamma  # Discount factor
+        self.tiles = tiles
+        # Asymmetric offsets (1, 3, 5 tile fractions per dimension) avoid diagonal artifacts
+        self.offsets = np.arange(tilings)[:, None] * np.array([1, 3, 5]) / tilings
+
+    @property
+    def n_actions(self):
+        return self.weights.shape[1]
+
+    def encode(self, observation):
+        """Active weight rows (learners x tilings) and an all-true mask"""
+        attempts, content_match, time_slots, max_slots = observation
+        features = np.column_stack([attempts, content_match, np.asarray(time_slots) / max_slots]) * TILE_SCALES
+        coordinates = np.floor(features[:, None, :] * self.tiles + self.offsets).astype(np.int64)
+        tiling = np.arange(len(self.offsets), dtype=np.int64)
+        hashed = (coordinates[..., 0] * 73856093) ^ (coordinates[..., 1] * 19349663) ^ \
+                 (coordinates[..., 2] * 83492791) ^ (tiling * 2654435761)
+        return hashed % len(self.weights), np.ones(len(features), dtype=bool)
+
+    def q_values(self, tiles):
+        return self.weights[tiles].sum(axis=-2)
+
+    def update(self, tiles, actions, rewards, next_tiles=None, done=False):
+        """
+        One batched semi-gradient Q-learning step and its TD errors; like
+        QTable.update, a weight hit several times moves by the mean step.
+        """
+        next_tiles = tiles if next_tiles is None else next_tiles
+        best_next_q = np.where(done, 0, self.q_values(next_tiles).max(axis=1))
+        td_errors = rewards + self.gamma * best_next_q - self.q_values(tiles)[np.arange(len(tiles)), actions]
+
+        keys = (tiles * self.n_actions + np.asarray(actions)[:, None]).ravel()
+        keys, inverse = np.unique(keys, return_inverse=True)
+        mean_td = np.bincount(inverse, np.repeat(td_errors, tiles.shape[1])) / np.bincount(inverse)
+        self.weights.reshape(-1)[keys] += self.alpha / tiles.shape[1] * mean_td
+        return td_errors
+
+    def best(self, tiles):
+        q_values = self.q_values(tiles)
+        actions = q_values.argmax(axis=-1)
+        return actions, q_values[np.arange(len(q_values)), actions]
+
+
+class LearnerSimulator:
+    """
+    Vectorized population of simulated learners, independent of Tk.
+
+    Every learner has a hidden ability and a hidden affinity for each study
+    strategy. One step is one memorizing session for all learners at once: the
+    effectiveness of the chosen strategy sets the content match reached, the
+    attempts needed and the time slots used, and the reward is the memorizing
+    score of the session. Observations are the raw (attempts, content match,
+    time slots, max slots) arrays of the latest session.
+    """
+
+    def __init__(self, n_learners=SIMULATED_LEARNERS, episode_length=EPISODE_LENGTH, max_slots=10, seed=None):
+        self.n_learners = n_learners
+        self.episode_length = episode_length
+        self.max_slots = max_slots
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self):
+        """Start a new episode with freshly drawn learners and return their first observation"""
+        rng = self.rng
+        n = self.n_learners
+        self.ability = rng.beta(2, 2, size=n)
+        self.affinity = (STRATEGY_EFFECT + STRATEGY_ABILITY_SLOPE * (self.ability[:, None] - 0.5) +
+                         rng.normal(0, 0.05, size=(n, len(ACTIONS))))
+        self.max_slots_used = np.broadcast_to(self.max_slots, n)
+        self.session = 0
+
+        # The first observation is a session with an unknown strategy
+        return self._observe(np.clip(self.ability + rng.normal(0, 0.1, size=n), 0, 1))
+
+    def _observe(self, effectiveness):
+        rng = self.rng
+        n = self.n_learners
+        max_slots = self.max_slots_used
+        content_match = np.rint(100 * np.clip(effectiveness + rng.normal(0, 0.05, size=n), 0, 1))
+        attempts = np.clip(np.rint(1 + 9 * (1 - effectiveness) + rng.normal(0, 0.7, size=n)), 1, 10)
+        time_slots = np.clip(np.rint(max_slots * (0.2 + 0.8 * (1 - effectiveness)) + rng.normal(0, 0.7, size=n)),
+                             1, max_slots)
+        self.observation = (attempts.astype(int), content_match.astype(int), time_slots.astype(int), max_slots)
+        return self.observation
+
+    def step(self, actions):
+        """Run one session with the given strategy indices; returns (observation, rewards, done)"""
+        n = self.n_learners
+        practice = 0.03 * self.session
+        effectiveness = np.clip(self.ability + self.affinity[np.arange(n), actions] + practice +
+                                self.rng.normal(0, 0.05, size=n), 0, 1)
+        observation = self._observe(effectiveness)
+        rewards = compute_memorizing_score(*observation)["final_score"]
+        self.session += 1
+        return observation, rewards, self.session >= self.episode_length
+
+
+def epsilon_greedy(q_table, states, epsilon, rng):
+    """Greedy actions with a random action in place of each with probability epsilon"""
+    actions, _ = q_table.best(states)
+    explore = rng.random(len(states)) < epsilon
+    return np.where(explore, rng.integers(0, q_table.n_actions, size=len(states)), actions)
+
+
+def train_on_simulator(q_table, simulator, episodes, epsilon=0.3, rng=None):
+    """
+    Epsilon-greedy Q-learning over batches of simulated learners, for a QTable
+    or a TileCodingQ; QTable states outside the grid are not trained on.
+
+    Each session of a whole batch is one q_table.update, so a batch of learners
+    costs a handful of array operations. Returns the mean episode return of
+    every batch.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    returns = []
+    for _ in range(-(-episodes // simulator.n_learners)):
+        observation = simulator.reset()
+        states, valid = q_table.encode(observation)
+        episode_return = np.zeros(simulator.n_learners)
+        done = False
+        while not done:
+            actions = epsilon_greedy(q_table, states, epsilon, rng)
+            observation, rewards, done = simulator.step(actions)
+            next_states, next_valid = q_table.encode(observation)
+            q_table.update(states[valid], actions[valid], rewards[valid], next_states[valid], done)
+            episode_return += rewards
+            states, valid = next_states, next_valid
+        returns.append(episode_return.mean())
+    return np.array(returns)
+
+
+def evaluate_policy(q_table, simulator, episodes):
+    """Mean episode return of the greedy policy on simulated learners (QTable or TileCodingQ)"""
+    total = 0.0
+    batches = -(-episodes // simulator.n_learners)
+    for _ in range(batches):
+        observation = simulator.reset()
+        done = False
+        while not done:
+            actions, _ = q_table.best(q_table.encode(observation)[0])
+            observation, rewards, done = simulator.step(actions)
+            total += rewards.mean()
+    return total / batches
+
+
+def train_lambda_on_simulator(q_table, simulator, episodes, lam=TRACE_LAMBDA, epsilon=0.3, method="sarsa",
+                              rng=None):
+    """
+    SARSA(lambda) or Watkins Q(lambda) over batches of simulated learners.
+
+    The eligibility traces of a batch are a learners x sessions array over the
+    (state, action) pairs visited so far in the episode, decayed by
+    gamma * lambda per session, so each TD error also updates the earlier
+    sessions of the same learner. method is "sarsa" (on-policy target) or
+    "watkins" (greedy target; a learner's traces are cut after an exploratory
+    action). Returns the mean episode return of every batch.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = simulator.n_learners
+    length = simulator.episode_length
+    decay = q_table.gamma * lam
+    returns = []
+    for _ in range(-(-episodes // n)):
+        observation = simulator.reset()
+        states, valid = q_table.encode(observation)
+        actions = epsilon_greedy(q_table, states, epsilon, rng)
+        visited_states = np.zeros((n, length), dtype=np.int64)
+        visited_actions = np.zeros((n, length), dtype=np.int64)
+        traces = np.zeros((n, length))
+        episode_return = np.zeros(n)
+
+        for session in range(length):
+            visited_states[:, session] = states
+            visited_actions[:, session] = actions
+            traces[:, :session] *= decay
+            traces[:, session] = valid
+
+            observation, rewards, done = simulator.step(actions)
+            next_states, next_valid = q_table.encode(observation)
+            if done:
+                targets = rewards
+            else:
+                next_actions = epsilon_greedy(q_table, next_states, epsilon, rng)
+                greedy_actions, greedy_q = q_table.best(next_states)
+                next_q = q_table.q(next_states, next_actions) if method == "sarsa" else greedy_q
+                targets = rewards + q_table.gamma * next_q
+            td_errors = targets - q_table.q(states, actions)
+
+            active = traces[:, :session + 1] > 0
+            q_table.adjust(visited_states[:, :session + 1][active], visited_actions[:, :session + 1][active],
+                           (td_errors[:, None] * traces[:, :session + 1])[active])
+
+            episode_return += rewards
+            if done:
+                break
+            if method == "watkins":
+                traces[next_actions != greedy_actions] = 0
+            states, valid, actions = next_states, next_valid, next_actions
+        returns.append(episode_return.mean())
+    return np.array(returns)
+
+
+def benchmark_convergence(checkpoints=CONVERGENCE_CHECKPOINTS, lam=TRACE_LAMBDA, epsilon=0.3, seed=0):
+    """
+    Held-out greedy return after each number of training episodes for one-step
+    Q-learning, SARSA(lambda) and Q(lambda), all on the same simulated learners.
+    """
+    methods = {
+        "Q-learning": lambda q, sim, episodes, rng: train_on_simulator(q, sim, episodes, epsilon, rng),
+        "SARSA(lambda)": lambda q, sim, episodes, rng: train_lambda_on_simulator(q, sim, episodes, lam, epsilon,
+                                                                                "sarsa", rng),
+        "Q(lambda)": lambda q, sim, episodes, rng: train_lambda_on_simulator(q, sim, episodes, lam, epsilon,
+                                                                            "watkins", rng),
+    }
+    report = pd.DataFrame({"episodes": checkpoints})
+    for name, train in methods.items():
+        q_table = QTable()
+        simulator = LearnerSimulator(n_learners=CONVERGENCE_LEARNERS, seed=seed)
+        rng = np.random.default_rng(seed)
+        trained = 0
+        held_out = []
+        for checkpoint in checkpoints:
+            train(q_table, simulator, checkpoint - trained, rng)
+            trained = checkpoint
+            held_out.append(evaluate_policy(q_table, LearnerSimulator(seed=seed + 1), SIMULATED_LEARNERS * 5))
+        report[name] = held_out
+    return report
+
+
+def benchmark_sparse_memory(episodes=SIMULATED_EPISODES, max_slots=20, epsilon=0.3, seed=0):
+    """
+    Train a SparseQTable over FINE_STATE_SHAPE on simulated learners and report
+    its memory next to the dense table it replaces and the default Q-table.
+    """
+    sparse = SparseQTable(encoder=fine_state_keys)
+    default = QTable()
+    for learner in (sparse, default):
+        train_on_simulator(learner, LearnerSimulator(max_slots=max_slots, seed=seed), episodes, epsilon,
+                           np.random.default_rng(seed))
+
+    n_fine_states = int(np.prod(FINE_STATE_SHAPE))
+    dense_fine_bytes = n_fine_states * (len(ACTIONS) * sparse.values.itemsize + sparse.greedy_action.itemsize +
+                                        sparse.greedy_value.itemsize)
+    return pd.DataFrame([
+        {"store": "Sparse, fine states", "states": n_fine_states, **sparse.memory_report()},
+        {"store": "Dense, fine states", "states": n_fine_states, "visited_states": sparse.n_rows - 1,
+         "allocated_rows": n_fine_states, "resident_bytes": dense_fine_bytes},
+        {"store": "Dense, default states", "states": len(default.values), **default.memory_report()},
+    ])
+
+
+def benchmark_function_approximation(episodes=SIMULATED_EPISODES, max_slots=20, epsilon=0.3, seed=0):
+    """
+    Compare the tabular Q-table with tile coding on learners with up to
+    max_slots time slots. Returns a DataFrame with the held-out greedy return,
+    training time, weight memory and the share of sessions outside the grid.
+    """
+    results = []
+    for name, learner in (("Q-table", QTable()), ("Tile coding", TileCodingQ())):
+        started = time.perf_counter()
+        train_on_simulator(learner, LearnerSimulator(max_slots=max_slots, seed=seed), episodes, epsilon,
+                           np.random.default_rng(seed))
+        elapsed = time.perf_counter() - started
+
+        held_out = LearnerSimulator(max_slots=max_slots, seed=seed + 1)
+        outside = 1 - learner.encode(held_out.observation)[1].mean()
+        results.append({"learner": name, "held_out_return": evaluate_policy(learner, held_out, episodes // 10),
+                        "train_seconds": elapsed,
+                        "memory_kib": (learner.values if name == "Q-table" else learner.weights).nbytes / 1024,
+                        "outside_grid": outside})
+    return pd.DataFrame(results)
+
+
+class SumTree:
+    """Binary tree of priority sums over a fixed number of leaves"""
+
+    def __init__(self, capacity):
+        self.leaves = 1 << max(0, int(capacity - 1).bit_length())
+        self.nodes = np.zeros(2 * self.leaves)
+
+    @property
+    def total(self):
+        return self.nodes[1]
+
+    def update(self, indices, priorities):
+        nodes = np.unique(np.asarray(indices) + self.leaves)
+        self.nodes[np.asarray(indices) + self.leaves] = priorities
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.nodes[nodes] = self.nodes[2 * nodes] + self.nodes[2 * nodes + 1]
+
+    def find(self, values):
+        """Leaf index whose cumulative priority range contains each value"""
+        values = np.array(values, dtype=float)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            go_right = values >= self.nodes[left]
+            values -= np.where(go_right, self.nodes[left], 0)
+            nodes = left + go_right
+        return nodes - self.leaves
+
+
+class ReplayBuffer:
+    """
+    Fixed-capacity ring buffer of (state, action, reward, next state, done) samples.
+
+    Samples live in preallocated arrays, so memory stays constant and the
+    oldest samples are overwritten once the buffer is full. A sum tree over the
+    sample priorities supports proportional prioritized sampling next to
+    uniform sampling.
+    """
+
+    def __init__(self, capacity=REPLAY_CAPACITY):
+        self.capacity = capacity
+        self.states = np.zeros(capacity, dtype=np.int32)
+        self.actions = np.zeros(capacity, dtype=np.int8)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros(capacity, dtype=np.int32)
+        self.dones = np.zeros(capacity, dtype=bool)
+        self.tree = SumTree(capacity)
+        self.max_priority = 1.0
+        self.position = 0
+        self.size = 0
+        self.added = 0  # Samples ever added, to tell which slots changed since a copy
+
+    def __len__(self):
+        return self.size
+
+    def copy(self):
+        clone = copy.copy(self)
+        for name in ("states", "actions", "rewards", "next_states", "dones"):
+            setattr(clone, name, getattr(self, name).copy())
+        clone.tree = copy.copy(self.tree)
+        clone.tree.nodes = self.tree.nodes.copy()
+        return clone
+
+    def add(self, states, actions, rewards, next_states=None, dones=False):
+        """
+        Append samples, overwriting the oldest; new samples get the highest
+        priority seen. Without next states a sample transitions to itself.
+        """
+        states = np.atleast_1d(states)[-self.capacity:]
+        actions = np.atleast_1d(actions)[-self.capacity:]
+        rewards = np.atleast_1d(rewards)[-self.capacity:]
+        next_states = states if next_states is None else np.atleast_1d(next_states)[-self.capacity:]
+        slots = (self.position + np.arange(len(states))) % self.capacity
+        self.states[slots] = states
+        self.actions[slots] = actions
+        self.rewards[slots] = rewards
+        self.next_states[slots] = next_states
+        self.dones[slots] = dones
+        self.tree.update(slots, self.max_priority)
+        self.position = (self.position + len(states)) % self.capacity
+        self.size = min(self.size + len(states), self.capacity)
+        self.added += len(states)
+
+    def sample(self, batch_size, rng, prioritized=False, beta=PRIORITY_CORRECTION):
+        """
+        Indices of a batch drawn uniformly or in proportion to priority, and their update weights.
+
+        Prioritized samples are weighted by (N * P(i)) ** -beta, which corrects
+        the updates for samples being drawn more or less often than uniformly;
+        with beta=1 the weights average 1, so the step size matches uniform
+        replay. Uniform samples all weigh 1.
+        """
+        if not prioritized:
+            return rng.integers(0, self.size, size=batch_size), np.ones(batch_size)
+        # Stratified: one draw from each of batch_size equal slices of the total priority
+        segment = self.tree.total / batch_size
+        values = (np.arange(batch_size) + rng.random(batch_size)) * segment
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+        probabilities = self.tree.nodes[self.tree.leaves + indices] / self.tree.total
+        return indices, (self.size * probabilities) ** -beta
+
+    def batch(self, indices):
+        """(states, actions, rewards, next_states, dones), in QTable.update argument order"""
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
+
+    def update_priorities(self, indices, td_errors):
+        priorities = (np.abs(td_errors) + PRIORITY_EPSILON) ** PRIORITY_EXPONENT
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def merge_priorities(self, trained):
+        """Take the priorities learned on a copy of this buffer, except in slots written since the copy"""
+        written = min(self.added - trained.added, self.capacity)
+        kept = np.ones(self.capacity, dtype=bool)
+        kept[(trained.position + np.arange(written)) % self.capacity] = False
+        slots = np.flatnonzero(kept)
+        self.tree.update(slots, trained.tree.nodes[trained.tree.leaves + slots])
+        self.max_priority = max(self.max_priority, trained.max_priority)
+
+
+def replay_training(q_table, replay, epochs, batch_size, prioritized, rng, cancel=None, progress=None):
+    """
+    Replay mini-batches sampled from the buffer; an epoch is len(replay) samples.
+
+    Checks the cancel event before every batch and calls progress(epoch,
+    samples) after every epoch. Returns the number of completed epochs.
+    """
+    batches_per_epoch = -(-len(replay) // batch_size)
+    for epoch in range(1, epochs + 1):
+        for _ in range(batches_per_epoch):
+            if cancel is not None and cancel.is_set():
+                return epoch - 1
+            indices, weights = replay.sample(batch_size, rng, prioritized)
+            td_errors = q_table.update(*replay.batch(indices), weights=weights)
+            if prioritized:
+                replay.update_priorities(indices, td_errors)
+        if progress is not None:
+            progress(epoch, epoch * batches_per_epoch * batch_size)
+    return epochs
+
+
+def state_space_metadata():
+    """Definition of the state and action spaces a saved Q-table was trained on"""
+    return {"attempts": ATTEMPTS_RANGE.tolist(), "content_match": CONTENT_MATCH_RANGE.tolist(),
+            "time_slots": TIME_SLOTS_RANGE.tolist(), "actions": list(ACTIONS)}
+
+
+def save_model(path, q_table, replay, **extra):
+    """
+    Save the Q-table and replay buffer to one .npz file.
+
+    Metadata (format version, state space, learning parameters and any extra
+    keys) is stored as JSON next to the arrays. A Q-table larger than
+    MEMMAP_THRESHOLD is written to "<path>.qtable.npy" instead so that it can be
+    memory-mapped on load. The file is replaced atomically.
+    """
+    metadata = {"version": MODEL_FORMAT_VERSION, "state_space": state_space_metadata(),
+                "alpha": q_table.alpha, "gamma": q_table.gamma, "replay_capacity": replay.capacity,
+                "replay_position": replay.position, "replay_size": replay.size,
+                "max_priority": replay.max_priority, **extra}
+    leaves = replay.tree.leaves
+    arrays = {"replay_states": replay.states, "replay_actions": replay.actions,
+              "replay_rewards": replay.rewards, "replay_next_states": replay.next_states,
+              "replay_dones": replay.dones,
+              "replay_priorities": replay.tree.nodes[leaves:leaves + replay.capacity]}
+
+    if q_table.values.nbytes > MEMMAP_THRESHOLD:
+        table_path = path + ".qtable.npy"
+        np.save(table_path + ".tmp.npy", q_table.values)
+        os.replace(table_path + ".tmp.npy", table_path)
+        metadata["q_table_file"] = os.path.basename(table_path)
+    else:
+        arrays["q_values"] = q_table.values
+
+    temporary = path + ".tmp.npz"
+    np.savez(temporary, metadata=np.array(json.dumps(metadata)), **arrays)
+    os.replace(temporary, path)
+
+
+def load_model(path):
+    """
+    Load a model written by save_model; returns (q_table, replay, metadata).
+
+    Raises ValueError if the file was saved with another format version or
+    state space. A separately saved Q-table is memory-mapped copy-on-write.
+    Version 1 files have no transitions; their samples transition to themselves.
+    """
+    with np.load(path) as data:
+        metadata = json.loads(str(data["metadata"]))
+        if metadata.get("version") not in (1, MODEL_FORMAT_VERSION):
+            raise ValueError(f"unsupported model format version {metadata.get('version')}")
+        if metadata["state_space"] != state_space_metadata():
+            raise ValueError("the model was trained on a different state space")
+
+        q_table = QTable(alpha=metadata["alpha"], gamma=metadata["gamma"])
+        if "q_table_file" in metadata:
+            table_path = os.path.join(os.path.dirname(path), metadata["q_table_file"])
+            q_table.set_values(np.load(table_path, mmap_mode='c'))
+        else:
+            q_table.set_values(data["q_values"])
+
+        replay = ReplayBuffer(metadata["replay_capacity"])
+        replay.states[:] = data["replay_states"]
+        replay.actions[:] = data["replay_actions"]
+        replay.rewards[:] = data["replay_rewards"]
+        if metadata["version"] >= 2:
+            replay.next_states[:] = data["replay_next_states"]
+            replay.dones[:] = data["replay_dones"]
+        else:
+            replay.next_states[:] = replay.states
+        replay.tree.update(np.arange(replay.capacity), data["replay_priorities"])
+        replay.position = metadata["replay_position"]
+        replay.size = metadata["replay_size"]
+        replay.added = replay.size
+        replay.max_priority = metadata["max_priority"]
+    return q_table, replay, metadata
+
+
+class LearnerQStore:
+    """
+    Per-learner Q-tables in one memory-mapped (learners, states, actions) tensor.
+
+    The float32 tensor lives in a .npy file and a JSON sidecar maps learner
+    IDs to rows, so loading a learner's table reads only that learner's pages
+    and tens of thousands of learners share a single file. The file is
+    created on the first write and re-created with double the rows when full;
+    reset=True ignores an existing file, which the first write then replaces.
+    """
+
+    def __init__(self, path, n_states=int(np.prod(STATE_SHAPE)), n_actions=len(ACTIONS), reset=False):
+        self.path = path
+        self.index_path = path + ".index.json"
+        self.shape = (n_states, n_actions)
+        self.values = None
+        self.index = {}
+        if os.path.exists(path) and not reset:
+            self.values = np.lib.format.open_memmap(path, mode='r+')
+            if self.values.shape[1:] != self.shape or self.values.dtype != np.float32:
+                raise ValueError("the learner store was saved with a different state space")
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, learner):
+        return learner in self.index
+
+    @property
+    def capacity(self):
+        return 0 if self.values is None else len(self.values)
+
+    def row(self, learner):
+        """Row of the learner, allocating one (and growing the file) for a new learner"""
+        if learner not in self.index:
+            if len(self.index) >= self.capacity:
+                self._grow(max(LEARNER_CAPACITY, 2 * self.capacity))
+            self.index[learner] = len(self.index)
+        return self.index[learner]
+
+    def _grow(self, capacity):
+        temporary = self.path + ".tmp.npy"
+        grown = np.lib.format.open_memmap(temporary, mode='w+', dtype=np.float32, shape=(capacity, *self.shape))
+        for start in range(0, len(self.index), LEARNER_COPY_ROWS):
+            stop = min(start + LEARNER_COPY_ROWS, len(self.index))
+            grown[start:stop] = self.values[start:stop]
+        grown.flush()
+        del grown
+        self.values = None
+        os.replace(temporary, self.path)
+        self.values = np.lib.format.open_memmap(self.path, mode='r+')
+
+    def policy(self, learner, alpha=0.1, gamma=0.9):
+        """QTable with the learner's Q-values, or None for a learner without a table"""
+        if learner not in self.index:
+            return None
+        q_table = QTable(alpha=alpha, gamma=gamma)
+        q_table.set_values(self.values[self.index[learner]].astype(float))
+        return q_table
+
+    def store(self, learner, q_table):
+        row = self.row(learner)  # May re-create the file, so look the row up first
+        self.values[row] = q_table.values
+
+    def update(self, learner, states, actions, rewards, next_states=None, done=False, alpha=0.1, gamma=0.9):
+        """One Q-learning step on the learner's own table; returns the TD errors"""
+        q_table = self.policy(learner, alpha, gamma) or QTable(alpha=alpha, gamma=gamma)
+        td_errors = q_table.update(states, actions, rewards, next_states, done)
+        self.store(learner, q_table)
+        return td_errors
+
+    def flush(self):
+        """Write dirty pages and the ID index to disk"""
+        if self.values is None:
+            return
+        self.values.flush()
+        temporary = self.index_path + ".tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.index, f)
+        os.replace(temporary, self.index_path)
+
+
+def matched_action_return(q_table, states, actions, rewards, *transitions):
+    """
+    Held-out return estimate for logged data: the mean reward of the samples
+    whose logged action is the one the greedy policy would pick.
+    """
+    matched = q_table.best(states)[0] == actions
+    return float(rewards[matched].mean()) if matched.any() else np.nan
+
+
+def evaluate_configuration(task):
+    """Train one alpha/gamma/epsilon configuration and score it on held-out data (process pool worker)"""
+    q_table = QTable(alpha=task["alpha"], gamma=task["gamma"])
+    rng = np.random.default_rng(task["seed"])
+
+    if task["recorded"] is None:
+        # Simulated learners; the held-out learners come from a different seed
+        train_on_simulator(q_table, LearnerSimulator(seed=task["seed"]), task["episodes"], task["epsilon"], rng)
+        held_out = evaluate_policy(q_table, LearnerSimulator(seed=task["seed"] + 1), task["eval_episodes"])
+    else:
+        train, test = task["recorded"]
+        for _ in range(task["epochs"]):
+            order = rng.permutation(len(train[0]))
+            for start in range(0, len(order), REPLAY_BATCH_SIZE):
+                batch = order[start:start + REPLAY_BATCH_SIZE]
+                q_table.update(*(column[batch] for column in train))
+        held_out = matched_action_return(q_table, *test)
+
+    return {"alpha": task["alpha"], "gamma": task["gamma"], "epsilon": task["epsilon"],
+            "held_out_return": held_out}
+
+
+def run_sweep(alphas=SWEEP_ALPHAS, gammas=SWEEP_GAMMAS, epsilons=SWEEP_EPSILONS, episodes=SWEEP_EPISODES,
+              eval_episodes=SWEEP_EVAL_EPISODES, recorded_path=None, workers=None, seed=0):
+    """
+    Train every alpha x gamma x epsilon configuration in a process pool.
+
+    Configurations are trained on simulated learners, or on the replay buffer
+    of a saved model when recorded_path is given (then HOLD_OUT_FRACTION of the
+    samples is held out and epsilon does not apply). All configurations share
+    the same seeds and split. Returns a DataFrame ranked by held-out return.
+    """
+    recorded = None
+    if recorded_path is not None:
+        _, replay, _ = load_model(recorded_path)
+        samples = replay.batch(np.arange(len(replay)))
+        order = np.random.default_rng(seed).permutation(len(replay))
+        n_test = int(len(order) * HOLD_OUT_FRACTION)
+        recorded = (tuple(column[order[n_test:]] for column in samples),
+                    tuple(column[order[:n_test]] for column in samples))
+        epsilons = [np.nan]
+
+    tasks = [{"alpha": alpha, "gamma": gamma, "epsilon": epsilon, "episodes": episodes,
+              "eval_episodes": eval_episodes, "epochs": SWEEP_EPOCHS, "recorded": recorded, "seed": seed}
+             for alpha in alphas for gamma in gammas for epsilon in epsilons]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(evaluate_configuration, tasks))
+
+    report = pd.DataFrame(results).sort_values("held_out_return", ascending=False, na_position='last')
+    report.insert(0, "rank", np.arange(1, len(report) + 1))
+    return report
+
+
 class MemorizingQLearningApp:
-    def __init__(self, root):
+    def __init__(self, root, model_path=MODEL_PATH):
         self.root = root
+        self.model_path = model_path
         self.root.title("Memorizing Score with AI")
         self.root.geometry("900x750")
         self.root.configure(bg="#f5f5f5")
@@ -29,40 +1089,74 @@ class MemorizingQLearningApp:
         # Initialize score history
         self.score_history = []
 
+        # Continue from the model saved by the previous session
+        self.load_saved_model()
+        self.load_learner_policies()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def load_saved_model(self):
+        if not os.path.exists(self.model_path):
+            return
+        try:
+            self.q_table, self.replay, metadata = load_model(self.model_path)
+        except (OSError, ValueError, KeyError) as e:
+            self.status_var.set(f"Saved model not loaded: {e}")
+            return
+
+        self.simulated_episodes = metadata.get("simulated_episodes", 0)
+        self.learner_states = metadata.get("learner_states", {})
+        self.train_size_var.set(str(len(self.replay)))
+        self.status_var.set(f"Loaded saved model with {len(self.replay)} data points")
+        self.update_qtable_chart()
+
+    def load_learner_policies(self):
+        """Open the per-learner Q-tables stored next to the model"""
+        path = os.path.splitext(self.model_path)[0] + ".learners.npy"
+        try:
+            self.learner_policies = LearnerQStore(path)
+        except (OSError, ValueError) as e:
+            self.status_var.set(f"Learner policies not loaded: {e}")
+            self.learner_policies = LearnerQStore(path, reset=True)
+
+    def on_close(self):
+        """Stop any background training, save the model, then close the window"""
+        if self.training_thread is not None:
+            self.training_cancel.set()
+            self.training_thread.join()
+        try:
+            save_model(self.model_path, self.q_table, self.replay, simulated_episodes=self.simulated_episodes,
+                       learner_states=self.learner_states)
+            self.learner_policies.flush()
+        except OSError as e:
+            if not messagebox.askyesno("Save Failed", f"Could not save the model: {e}\nClose anyway?"):
+                return
+        self.root.destroy()
+
     def initialize_qlearning(self):
         """Initialize Q-learning parameters and Q-table"""
-        # State space dimensions
-        self.attempts_range = list(range(1, 11))  # 1-10 attempts
-        self.content_match_range = [0, 25, 50, 75, 100]  # Content match percentages
-        self.time_slots_range = list(range(1, 11))  # 1-10 time slots
-
-        # Action space: Study strategies
-        self.actions = [
-            "Visual Imagery",  # Focus on visual associations
-            "Spaced Repetition",  # Distributed practice over time
-            "Active Recall",  # Test yourself repeatedly
-            "Chunking",  # Group information
-            "Mnemonic Devices"  # Memory aids like acronyms
-        ]
-
         # Initialize Q-table with zeros
-        # Format: states x actions (attempts, content_match, time_slots) x actions
-        self.q_table = {}
-        for a in self.attempts_range:
-            for c in self.content_match_range:
-                for t in self.time_slots_range:
-                    state = (a, c, t)
-                    self.q_table[state] = {action: 0.0 for action in self.actions}
+        # Format: flat (attempts, content_match, time_slots) state rows x actions
+        self.q_table = QTable(alpha=0.1, gamma=0.9)
 
         # Q-learning parameters
-        self.alpha = 0.1  # Learning rate
-        self.gamma = 0.9  # Discount factor
         self.epsilon = 0.3  # Exploration rate
         self.current_state = None
         self.current_action = None
+        self.rng = np.random.default_rng()
+        self.simulated_episodes = 0
+
+        # Latest Q-table state of every learner, the start of their next transition
+        self.learner_states = {}
 
         # Training data
-        self.training_data = []
+        self.replay = ReplayBuffer(REPLAY_CAPACITY)
+
+        # Background training: the worker thread, its cancel flag and progress queue, and the
+        # online updates made while it trains, re-applied to the trained table when it is swapped in
+        self.training_thread = None
+        self.training_cancel = threading.Event()
+        self.training_updates = queue.Queue()
+        self.training_transitions = []
 
     def create_input_frame(self):
         """Create frame for input parameters"""
@@ -210,13 +1304,18 @@ class MemorizingQLearningApp:
         strategy_frame = ttk.Frame(self.qlearn_frame)
         strategy_frame.pack(fill="x", expand=True, pady=5)
 
+        # Scores saved under the same learner ID form that learner's sequence of transitions
+        ttk.Label(strategy_frame, text="Learner ID:").pack(side=tk.LEFT, padx=5)
+        self.learner_var = tk.StringVar(value="default")
+        ttk.Entry(strategy_frame, textvariable=self.learner_var, width=12).pack(side=tk.LEFT, padx=5)
+
         ttk.Label(strategy_frame, text="Study Strategy:").pack(side=tk.LEFT, padx=5)
 
         self.strategy_var = tk.StringVar()
         strategy_dropdown = ttk.Combobox(
             strategy_frame,
             textvariable=self.strategy_var,
-            values=self.actions,
+            values=ACTIONS,
             state="readonly",
             width=20
         )
@@ -254,13 +1353,43 @@ class MemorizingQLearningApp:
         self.train_size_var = tk.StringVar(value="0")
         ttk.Label(control_frame, textvariable=self.train_size_var).pack(side=tk.LEFT, padx=5)
 
-        # Manual training button
-        train_button = ttk.Button(
+        # Manual training button replays the recorded data in the background
+        self.cancel_train_button = ttk.Button(
+            control_frame,
+            text="Cancel",
+            command=self.cancel_training,
+            state=tk.DISABLED
+        )
+        self.cancel_train_button.pack(side=tk.RIGHT, padx=5)
+
+        self.train_button = ttk.Button(
             control_frame,
             text="Train Model",
             command=self.manual_train
         )
-        train_button.pack(side=tk.RIGHT, padx=5)
+        self.train_button.pack(side=tk.RIGHT, padx=5)
+
+        self.simulate_button = ttk.Button(
+            control_frame,
+            text="Train on Simulated Learners",
+            command=self.train_on_simulated_learners
+        )
+        self.simulate_button.pack(side=tk.RIGHT, padx=5)
+
+        # Replay settings
+        self.prioritized_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text="Prioritized",
+                        variable=self.prioritized_var).pack(side=tk.RIGHT, padx=5)
+
+        self.batch_size_var = tk.IntVar(value=REPLAY_BATCH_SIZE)
+        ttk.Spinbox(control_frame, from_=1, to=4096, textvariable=self.batch_size_var,
+                    width=6).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(control_frame, text="Batch Size:").pack(side=tk.RIGHT)
+
+        self.epochs_var = tk.IntVar(value=REPLAY_EPOCHS)
+        ttk.Spinbox(control_frame, from_=1, to=1000, textvariable=self.epochs_var,
+                    width=5).pack(side=tk.RIGHT, padx=5)
+        ttk.Label(control_frame, text="Epochs:").pack(side=tk.RIGHT)
 
     def create_chart_frame(self):
         """Create frame for charts and visualization"""
@@ -286,6 +1415,8 @@ class MemorizingQLearningApp:
         self.breakdown_chart = self.breakdown_fig.add_subplot(111)
         self.breakdown_canvas = FigureCanvasTkAgg(self.breakdown_fig, self.breakdown_tab)
         self.breakdown_canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.breakdown_wedges = None
+        self.breakdown_after = None
 
         # Set up history display
         history_frame = ttk.Frame(self.history_tab)
@@ -309,6 +1440,7 @@ class MemorizingQLearningApp:
         self.qtable_canvas.get_tk_widget().pack(fill="both", expand=True)
 
         # Initialize an empty Q-table visualization
+        self.create_qtable_chart()
         self.update_qtable_chart()
 
     def calculate_score(self):
@@ -326,12 +1458,11 @@ class MemorizingQLearningApp:
                 return
 
             # Calculate scores
-            attempt_score = 100 * math.exp(-0.5 * (attempts - 1))
-            content_score = content_match
-            time_efficiency = max(0, 100 * (1 - (time_slots / max_slots)))
-
-            # Calculate final score
-            final_score = (0.5 * content_score) + (0.3 * attempt_score) + (0.2 * time_efficiency)
+            scores = compute_memorizing_score(attempts, content_match, time_slots, max_slots)
+            attempt_score = float(scores["attempt_score"])
+            content_score = float(scores["content_score"])
+            time_efficiency = float(scores["time_efficiency"])
+            final_score = float(scores["final_score"])
 
             # Update result displays
             self.result_vars["final_score"].set(f"{final_score:.2f}/100")
@@ -340,9 +1471,9 @@ class MemorizingQLearningApp:
             self.result_vars["time_score"].set(f"{time_efficiency:.2f}/100 (20% weight)")
 
             # Update breakdown
-            content_contribution = 0.5 * content_score
-            attempt_contribution = 0.3 * attempt_score
-            time_contribution = 0.2 * time_efficiency
+            content_contribution = float(scores["content_contribution"])
+            attempt_contribution = float(scores["attempt_contribution"])
+            time_contribution = float(scores["time_contribution"])
 
             self.breakdown_var.set(
                 f"Content: {content_contribution:.2f} pts + "
@@ -368,46 +1499,67 @@ class MemorizingQLearningApp:
                 }
             }
 
-            # Save state for Q-learning
-            closest_content = min(self.content_match_range, key=lambda x: abs(x - content_match))
-            self.current_state = (attempts, closest_content, time_slots)
+            # Save state for Q-learning; states outside the Q-table grid are not trained on
+            state, valid = state_index(attempts, content_match, time_slots)
+            self.current_state = int(state) if valid else None
 
             # Update the chart
-            self.update_breakdown_chart()
+            self.schedule_breakdown_chart()
 
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
+    def schedule_breakdown_chart(self):
+        """Coalesce rapid score changes into one breakdown chart update"""
+        if self.breakdown_after is not None:
+            self.root.after_cancel(self.breakdown_after)
+        self.breakdown_after = self.root.after(BREAKDOWN_DEBOUNCE_MS, self.update_breakdown_chart)
+
     def update_breakdown_chart(self):
-        """Update the breakdown pie chart"""
+        """Update the breakdown pie chart, reusing its wedge and text artists"""
+        self.breakdown_after = None
         if not hasattr(self, 'current_score'):
             return
 
-        # Clear previous chart
-        self.breakdown_chart.clear()
-
         # Create data for pie chart
-        labels = ['Content Match (50%)', 'Attempts (30%)', 'Time Efficiency (20%)']
-        sizes = [
+        sizes = np.array([
             self.current_score["breakdown"]["content"],
             self.current_score["breakdown"]["attempts"],
             self.current_score["breakdown"]["time"]
-        ]
+        ])
+
+        if self.breakdown_wedges is None:
+            # Create pie chart once
+            self.breakdown_wedges, self.breakdown_labels, self.breakdown_percents = self.breakdown_chart.pie(
+                sizes,
+                labels=BREAKDOWN_LABELS,
+                autopct='%1.1f%%',
+                startangle=90,
+                shadow=True,
+                explode=BREAKDOWN_EXPLODE
+            )
+            self.breakdown_chart.axis('equal')
+        else:
+            # Move the existing wedges and labels to the new fractions (same layout as pie())
+            fractions = sizes / sizes.sum()
+            angles = 90 + 360 * np.concatenate([[0], np.cumsum(fractions)])
+            for i, (wedge, label, percent) in enumerate(zip(self.breakdown_wedges, self.breakdown_labels,
+                                                            self.breakdown_percents)):
+                middle = np.deg2rad((angles[i] + angles[i + 1]) / 2)
+                direction = np.array([np.cos(middle), np.sin(middle)])
+                center = BREAKDOWN_EXPLODE[i] * direction
+                wedge.set_center(center)
+                wedge.set_theta1(angles[i])
+                wedge.set_theta2(angles[i + 1])
+                label.set_position(center + 1.1 * direction)
+                label.set_horizontalalignment('left' if direction[0] > 0 else 'right')
+                percent.set_position(center + 0.6 * direction)
+                percent.set_text(f'{100 * fractions[i]:.1f}%')
 
-        # Create pie chart
-        self.breakdown_chart.pie(
-            sizes,
-            labels=labels,
-            autopct='%1.1f%%',
-            startangle=90,
-            shadow=True,
-            explode=(0.1, 0, 0)
-        )
-        self.breakdown_chart.axis('equal')
         self.breakdown_chart.set_title(f'Score Breakdown: {self.current_score["final_score"]:.2f}/100')
 
-        # Refresh canvas
-        self.breakdown_canvas.draw()
+        # Refresh canvas when Tk is idle
+        self.breakdown_canvas.draw_idle()
 
     def save_and_train(self):
         """Save current score to history and update Q-learning model"""
@@ -419,20 +1571,41 @@ class MemorizingQLearningApp:
 
             # Set the current action for Q-learning
             self.current_action = self.strategy_var.get()
+            learner = self.learner_var.get().strip() or "default"
 
             # Update score history with strategy
             self.score_history.append(self.current_score)
 
-            # Add score to training data
-            self.training_data.append({
-                "state": self.current_state,
-                "action": self.current_action,
-                "reward": self.current_score["final_score"]
-            })
+            # The strategy was chosen after the learner's previous session and led to this one
+            # A session outside the grid keeps the learner's last in-grid state as the start
+            previous_state = self.learner_states.get(learner)
+            if self.current_state is not None:
+                self.learner_states[learner] = self.current_state
+            action = ACTIONS.index(self.current_action)
+            reward = self.current_score["final_score"]
+
+            if previous_state is not None and self.current_state is not None:
+                # Add the transition to training data and apply it online
+                self.replay.add(previous_state, action, reward, self.current_state)
+                self.q_table.update(previous_state, action, reward, self.current_state)
+                if self.training_thread is not None:
+                    self.training_transitions.append((previous_state, action, reward, self.current_state))
+                self.learner_policies.update(learner, previous_state, action, reward, self.current_state,
+                                             alpha=self.q_table.alpha, gamma=self.q_table.gamma)
+                self.status_var.set(f"Updated online from {learner}'s last session, "
+                                    f"{len(self.replay)} transitions recorded")
+            elif self.current_state is None and previous_state is not None:
+                self.status_var.set(f"State outside the Q-table grid, not used for training; {learner}'s "
+                                    f"next session continues from their last in-grid one")
+            elif self.current_state is None:
+                self.status_var.set("State outside the Q-table grid, not used for training")
+            else:
+                self.status_var.set(f"Recorded {learner}'s first session; the next one will train the model")
 
             # Update history display
             self.history_listbox.insert(
                 tk.END,
+                f"Learner: {learner} - "
                 f"Score: {self.current_score['final_score']:.2f} - "
                 f"Strategy: {self.current_action} - "
                 f"Attempts: {self.current_score['attempts']}, "
@@ -440,49 +1613,136 @@ class MemorizingQLearningApp:
             )
 
             # Update training data size display
-            self.train_size_var.set(str(len(self.training_data)))
-
-            # Train the Q-learning model with new data
-            self.train_qlearning()
+            self.train_size_var.set(str(len(self.replay)))
+            self.update_qtable_chart()
 
-            messagebox.showinfo("Success", "Score saved and Q-learning model updated.")
+            messagebox.showinfo("Success", f"Score saved. {self.status_var.get()}.")
         else:
             messagebox.showwarning("Warning", "Calculate a score first before saving.")
 
-    def train_qlearning(self):
-        """Train the Q-learning model with current data"""
-        if len(self.training_data) < 1:
+    def train_qlearning(self, epochs=REPLAY_EPOCHS, batch_size=REPLAY_BATCH_SIZE, prioritized=False):
+        """
+        Start replaying the buffer in a worker thread.
+
+        The thread trains copies of the Q-table and buffer, so the window keeps
+        using the current model; the trained table is swapped in when the
+        thread finishes, and cancelling leaves the model unchanged.
+        """
+        if len(self.replay) < 1:
             self.status_var.set("Need more data for training")
             return
+        if self.training_thread is not None:
+            self.status_var.set("Training is already running")
+            return
 
-        # Update each state-action pair in Q-table based on rewards
-        for data_point in self.training_data:
-            state = data_point["state"]
-            action = data_point["action"]
-            reward = data_point["reward"]
-
-            # Find best next state value (simplified as we don't have explicit transitions)
-            best_next_q = max(self.q_table.get(state, {}).values()) if state in self.q_table else 0
-
-            # Q-learning update formula
-            if state in self.q_table and action in self.q_table[state]:
-                self.q_table[state][action] = (1 - self.alpha) * self.q_table[state][action] + \
-                                              self.alpha * (reward + self.gamma * best_next_q)
+        self.training_cancel = threading.Event()
+        self.training_updates = queue.Queue()
+        self.training_transitions = []
+        self.training_thread = threading.Thread(
+            target=self.run_training,
+            args=(self.q_table.copy(), self.replay.copy(), epochs, batch_size, prioritized,
+                  np.random.default_rng(self.rng.integers(2 ** 63)), self.training_cancel, self.training_updates),
+            daemon=True
+        )
+        self.training_thread.start()
+
+        self.train_button.config(state=tk.DISABLED)
+        self.simulate_button.config(state=tk.DISABLED)
+        self.cancel_train_button.config(state=tk.NORMAL)
+        self.status_var.set(f"Training on {len(self.replay)} data points...")
+        self.root.after(TRAINING_POLL_MS, self.poll_training)
+
+    @staticmethod
+    def run_training(q_table, replay, epochs, batch_size, prioritized, rng, cancel, updates):
+        """Worker thread: train the copies and post progress and the result to the queue"""
+        started = time.perf_counter()
+        try:
+            completed = replay_training(
+                q_table, replay, epochs, batch_size, prioritized, rng, cancel,
+                lambda epoch, samples: updates.put(("progress", epoch, epochs, samples, time.perf_counter() - started))
+            )
+        except Exception as e:
+            updates.put(("error", e))
+            return
+        updates.put(("cancelled" if cancel.is_set() else "done", q_table, replay, completed,
+                     time.perf_counter() - started))
+
+    def poll_training(self):
+        """Show the worker's progress and swap in its result once it is done"""
+        while True:
+            try:
+                message = self.training_updates.get_nowait()
+            except queue.Empty:
+                self.root.after(TRAINING_POLL_MS, self.poll_training)
+                return
 
-        # Update status
-        self.status_var.set(f"Trained with {len(self.training_data)} data points")
+            if message[0] == "progress":
+                _, epoch, epochs, samples, elapsed = message
+                self.status_var.set(f"Training: epoch {epoch}/{epochs}, {samples:,} samples replayed, "
+                                    f"{elapsed:.1f}s")
+            else:
+                break
+
+        self.training_thread = None
+        self.train_button.config(state=tk.NORMAL)
+        self.simulate_button.config(state=tk.NORMAL)
+        self.cancel_train_button.config(state=tk.DISABLED)
+
+        if message[0] == "error":
+            self.training_transitions = []
+            self.status_var.set(f"Training failed: {message[1]}")
+        elif message[0] == "cancelled":
+            self.training_transitions = []
+            self.status_var.set(f"Training cancelled after {message[3]} epoch(s), model unchanged")
+        else:
+            _, q_table, replay, completed, elapsed = message
+            self.finish_training(q_table, replay)
+            self.status_var.set(f"Replayed {len(replay)} data points for {completed} epoch(s) "
+                                f"in {elapsed:.1f}s")
+
+    def finish_training(self, q_table, replay):
+        """Swap in the trained table, then re-apply the online updates made while it trained"""
+        for transition in self.training_transitions:
+            q_table.update(*transition)
+        self.training_transitions = []
+        self.q_table = q_table
+        self.replay.merge_priorities(replay)
 
         # Update Q-table visualization
         self.update_qtable_chart()
 
+    def cancel_training(self):
+        if self.training_thread is not None:
+            self.training_cancel.set()
+            self.status_var.set("Cancelling training...")
+
     def manual_train(self):
         """Manually trigger Q-learning training"""
-        if len(self.training_data) < 1:
+        if len(self.replay) < 1:
             messagebox.showwarning("Warning", "No training data available. Add some scores first.")
             return
 
-        self.train_qlearning()
-        messagebox.showinfo("Training Complete", f"Model trained with {len(self.training_data)} data points")
+        try:
+            epochs = int(self.epochs_var.get())
+            batch_size = int(self.batch_size_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Input Error", "Epochs and batch size must be whole numbers.")
+            return
+        if epochs < 1 or batch_size < 1:
+            messagebox.showerror("Input Error", "Epochs and batch size must be at least 1.")
+            return
+
+        self.train_qlearning(epochs, batch_size, self.prioritized_var.get())
+
+    def train_on_simulated_learners(self):
+        """Pre-train the Q-table on simulated learners"""
+        simulator = LearnerSimulator(max_slots=self.vars["max_slots"].get())
+        returns = train_on_simulator(self.q_table, simulator, SIMULATED_EPISODES, self.epsilon, self.rng)
+        self.simulated_episodes += SIMULATED_EPISODES
+
+        self.status_var.set(f"Trained on {self.simulated_episodes:,} simulated episodes "
+                            f"(mean return {returns[-1]:.1f})")
+        self.update_qtable_chart()
 
     def get_recommended_strategy(self):
         """Get the best strategy for current state based on Q-table"""
@@ -491,89 +1751,71 @@ class MemorizingQLearningApp:
             attempts = self.vars["attempts"].get()
             content_match = self.vars["content_match"].get()
             time_slots = self.vars["time_slots"].get()
+            learner = self.learner_var.get().strip() or "default"
 
-            # Find closest content match in our discrete space
-            closest_content = min(self.content_match_range, key=lambda x: abs(x - content_match))
-
-            # Create state
-            state = (attempts, closest_content, time_slots)
-
-            if len(self.training_data) < 3:
+            if len(self.replay) < 3 and not self.simulated_episodes and learner not in self.learner_policies:
                 self.recommendation_var.set("Need more training data")
                 return
 
-            # Check if state exists in Q-table
-            if state in self.q_table:
-                # Get best action from Q-table
-                q_values = self.q_table[state]
-                best_action = max(q_values, key=q_values.get)
-                best_value = q_values[best_action]
-
-                if best_value > 0:
-                    self.recommendation_var.set(f"{best_action} (Q-value: {best_value:.2f})")
-                else:
-                    # Not enough data for this state
-                    self.recommendation_var.set("Explore different strategies")
+            # Get best action from the learner's own Q-table, or the shared one where it has no data
+            best_action, best_value, valid = recommend_strategies(self.q_table, [attempts], [content_match],
+                                                                  [time_slots])
+            source = ""
+            policy = self.learner_policies.policy(learner)
+            if policy is not None:
+                own_action, own_value, _ = recommend_strategies(policy, [attempts], [content_match], [time_slots])
+                if valid[0] and own_value[0] > 0:
+                    best_action, best_value, source = own_action, own_value, f", from {learner}'s sessions"
+            label = recommendation_labels(best_action, best_value, valid)[0]
+            if valid[0] and best_value[0] > 0:
+                self.recommendation_var.set(f"{label} (Q-value: {best_value[0]:.2f}{source})")
             else:
-                # State not in Q-table, give general recommendation
-                self.recommendation_var.set("Try any strategy and provide feedback")
+                # Not enough data for this state, or state not in Q-table
+                self.recommendation_var.set(label)
 
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {str(e)}")
 
-    def update_qtable_chart(self):
-        """Update the Q-table heatmap visualization"""
-        self.qtable_chart.clear()
-
-        if len(self.training_data) < 1:
-            self.qtable_chart.text(0.5, 0.5, "No training data available yet",
-                                   ha='center', va='center', fontsize=12)
-            self.qtable_canvas.draw()
-            return
-
-        # Extract Q-values for visualization
-        # We'll take average Q-value for each action across states
-        action_values = {action: [] for action in self.actions}
-
-        for state, actions in self.q_table.items():
-            for action, value in actions.items():
-                if value > 0:  # Only consider trained values
-                    action_values[action].append(value)
-
-        # Calculate average Q-value for each action
-        action_avg = {}
-        for action, values in action_values.items():
-            if values:
-                action_avg[action] = sum(values) / len(values)
-            else:
-                action_avg[action] = 0
-
-        # Sort actions by average Q-value
-        sorted_actions = sorted(action_avg.items(), key=lambda x: x[1], reverse=True)
-
-        # Prepare data for bar chart
-        actions = [a[0] for a in sorted_actions]
-        values = [a[1] for a in sorted_actions]
-
-        # Create bar chart
-        bars = self.qtable_chart.bar(actions, values, color='skyblue')
+    def create_qtable_chart(self):
+        """Create the bar, value label and placeholder artists that update_qtable_chart reuses"""
+        positions = np.arange(len(ACTIONS))
+        self.qtable_bars = self.qtable_chart.bar(positions, np.zeros(len(ACTIONS)), color='skyblue')
 
-        # Add value labels on top of bars
-        for bar in bars:
-            height = bar.get_height()
-            if height > 0:
-                self.qtable_chart.text(bar.get_x() + bar.get_width() / 2., height + 0.1,
-                                       f'{height:.2f}', ha='center', va='bottom', rotation=0)
+        # Value labels on top of bars
+        self.qtable_labels = [
+            self.qtable_chart.text(bar.get_x() + bar.get_width() / 2., 0, '', ha='center', va='bottom', rotation=0)
+            for bar in self.qtable_bars
+        ]
+        self.qtable_placeholder = self.qtable_chart.text(0.5, 0.5, "No training data available yet",
+                                                         ha='center', va='center', fontsize=12,
+                                                         transform=self.qtable_chart.transAxes)
 
         self.qtable_chart.set_title('Strategy Effectiveness (Average Q-Values)')
         self.qtable_chart.set_ylabel('Q-Value')
-        self.qtable_chart.set_ylim(0, max(values) * 1.2 if values and max(values) > 0 else 10)
+        self.qtable_chart.set_xticks(positions)
 
         # Rotate x-axis labels for better readability
-        plt.setp(self.qtable_chart.get_xticklabels(), rotation=45, ha='right')
-
+        self.qtable_chart.set_xticklabels(ACTIONS, rotation=45, ha='right')
         self.qtable_fig.tight_layout()
-        self.qtable_canvas.draw()
+
+    def update_qtable_chart(self):
+        """Update the strategy effectiveness bars in place from the running per-action averages"""
+        # Average Q-value of the trained entries for each action, sorted by value
+        action_avg = self.q_table.action_means()
+        order = np.argsort(-action_avg, kind='stable')
+        trained = self.q_table.trained_count.sum() > 0
+
+        self.qtable_placeholder.set_visible(not trained)
+        for bar, label, action in zip(self.qtable_bars, self.qtable_labels, order):
+            height = action_avg[action]
+            bar.set_height(height)
+            bar.set_visible(trained)
+            label.set_text(f'{height:.2f}' if height > 0 else '')
+            label.set_y(height + 0.1)
+
+        self.qtable_chart.set_xticklabels([ACTIONS[i] for i in order], rotation=45, ha='right')
+        self.qtable_chart.set_ylim(0, action_avg.max() * 1.2 if action_avg.max() > 0 else 10)
+        self.qtable_canvas.draw_idle()
 
     def clear_history(self):
         """Clear the score history"""
@@ -594,8 +1836,102 @@ def setup_styles():
     style.configure("TLabelframe.Label", font=("Arial", 11, "bold"))
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Memorizing score with Q-learning strategy recommendations")
+    commands = parser.add_subparsers(dest="command")
+
+    sweep = commands.add_parser("sweep", help="rank alpha/gamma/epsilon configurations by held-out return")
+    sweep.add_argument("--alphas", type=float, nargs="+", default=SWEEP_ALPHAS, help="learning rates to try")
+    sweep.add_argument("--gammas", type=float, nargs="+", default=SWEEP_GAMMAS, help="discount factors to try")
+    sweep.add_argument("--epsilons", type=float, nargs="+", default=SWEEP_EPSILONS,
+                       help="exploration rates to try")
+    sweep.add_argument("--episodes", type=int, default=SWEEP_EPISODES,
+                       help="simulated training episodes per configuration")
+    sweep.add_argument("--eval-episodes", type=int, default=SWEEP_EVAL_EPISODES,
+                       help="held-out simulated episodes per configuration")
+    sweep.add_argument("--recorded", metavar="MODEL_FILE",
+                       help="train on the replay buffer of a saved model instead of simulated learners")
+    sweep.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    sweep.add_argument("--seed", type=int, default=0, help="seed shared by all configurations")
+    sweep.add_argument("--report", metavar="CSV", help="also write the ranked results to a CSV file")
+
+    recommend = commands.add_parser("recommend", help="recommend a strategy for every learner in a CSV file")
+    recommend.add_argument("input", help="CSV with attempts, content_match and time_slots columns")
+    recommend.add_argument("--model", default=MODEL_PATH, help="saved model to recommend from")
+    recommend.add_argument("--output", help="CSV to write (default: print to the console)")
+
+    score = commands.add_parser("score", help="score every record of a CSV file")
+    score.add_argument("input", help="CSV with attempts, content_match, time_slots and max_slots columns")
+    score.add_argument("output", help="CSV to write with the score and breakdown columns")
+    score.add_argument("--chunk-size", type=int, default=SCORE_CHUNK_SIZE, help="rows read per chunk")
+
+    convergence = commands.add_parser("convergence",
+                                      help="compare Q-learning with SARSA(lambda) and Q(lambda) on simulated learners")
+    convergence.add_argument("--lam", type=float, default=TRACE_LAMBDA, help="trace decay lambda")
+    convergence.add_argument("--checkpoints", type=int, nargs="+", default=CONVERGENCE_CHECKPOINTS,
+                             help="training episodes at which the held-out return is measured")
+
+    memory = commands.add_parser("memory", help="report sparse Q store memory on a widened state space")
+    memory.add_argument("--episodes", type=int, default=SIMULATED_EPISODES, help="simulated training episodes")
+
+    benchmark = commands.add_parser("benchmark", help="compare the Q-table with tile coding on simulated learners")
+    benchmark.add_argument("--episodes", type=int, default=SIMULATED_EPISODES, help="training episodes per learner")
+    benchmark.add_argument("--max-slots", type=int, default=20, help="maximum time slots of the simulated learners")
+
+    args = parser.parse_args()
+
+    if args.command == "sweep":
+        started = time.perf_counter()
+        report = run_sweep(args.alphas, args.gammas, args.epsilons, args.episodes, args.eval_episodes,
+                           args.recorded, args.workers, args.seed)
+        print(report.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+        print(f"{len(report)} configurations in {time.perf_counter() - started:.1f}s")
+        if args.report:
+            report.to_csv(args.report, index=False)
+        return
+
+    if args.command == "convergence":
+        report = benchmark_convergence(args.checkpoints, args.lam)
+        print(report.to_string(index=False, float_format=lambda value: f"{value:.1f}"))
+        return
+
+    if args.command == "memory":
+        report = benchmark_sparse_memory(args.episodes)
+        report["resident_mib"] = report.pop("resident_bytes") / 2 ** 20
+        print(report.to_string(index=False, float_format=lambda value: f"{value:.2f}"))
+        return
+
+    if args.command == "benchmark":
+        report = benchmark_function_approximation(args.episodes, args.max_slots)
+        print(report.to_string(index=False, float_format=lambda value: f"{value:.3f}"))
+        return
+
+    if args.command == "score":
+        started = time.perf_counter()
+        rows, invalid = score_csv(args.input, args.output, args.chunk_size)
+        print(f"Scored {rows:,} records ({invalid:,} invalid) in {time.perf_counter() - started:.1f}s "
+              f"-> {args.output}")
+        return
+
+    if args.command == "recommend":
+        q_table = load_model(args.model)[0]
+        learners = pd.read_csv(args.input)
+        actions, q_values, valid = recommend_strategies(q_table, learners["attempts"].to_numpy(),
+                                                        learners["content_match"].to_numpy(),
+                                                        learners["time_slots"].to_numpy())
+        learners["recommended_strategy"] = recommendation_labels(actions, q_values, valid)
+        learners["q_value"] = np.where(valid, q_values, np.nan)
+        if args.output:
+            learners.to_csv(args.output, index=False)
+        else:
+            print(learners.to_string(index=False))
+        return
+
     root = tk.Tk()
     setup_styles()
     app = MemorizingQLearningApp(root)
     root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
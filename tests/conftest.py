@@ -0,0 +1,23 @@
+import importlib.util
+import pathlib
+
+import pytest
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope="session")
+def load_script():
+    """Import one of the standalone scripts (their names are not valid module names)"""
+    loaded = {}
+
+    def load(filename):
+        if filename not in loaded:
+            spec = importlib.util.spec_from_file_location(pathlib.Path(filename).stem.replace("-", "_"),
+                                                          ROOT / filename)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            loaded[filename] = module
+        return loaded[filename]
+
+    return load
@@ -0,0 +1,48 @@
+import queue
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def feedback(load_script):
+    return load_script("Source_FeedbackOneStuOneSub.py")
+
+
+HEADER = "Post1_ID,Post2_ID,Student,Subject,Topics,Correlation,Time_Gap\n"
+
+
+def run_worker(feedback, path):
+    messages = queue.Queue()
+    feedback.PostCorrelationAnalysis._load_worker(str(path), threading.Event(), messages)
+    return [messages.get_nowait() for _ in range(messages.qsize())]
+
+
+def test_a_clean_load_ends_with_done(feedback, tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text(HEADER + "P001,P002,Alice,Math,A - B,0.5,1 days\n")
+    messages = run_worker(feedback, path)
+    assert [kind for kind, _, _ in messages] == ["rows", "done"]
+
+
+@pytest.mark.parametrize("body", [
+    "P001,P002,Alice,Math\n",
+    "P001,P99999999999,Alice,Math,A - B,0.5,1 days\n",
+])
+def test_a_bad_record_ends_the_load_with_an_error(feedback, tmp_path, body):
+    path = tmp_path / "rows.csv"
+    path.write_text(HEADER + body)
+    kind, error, _ = run_worker(feedback, path)[-1]
+    assert kind == "error" and "record 1" in error
+
+
+def test_unexpected_worker_failures_still_end_the_load(feedback, tmp_path, monkeypatch):
+    # The load controls stay locked until a terminal message reaches the Tk thread
+    path = tmp_path / "rows.csv"
+    path.write_text(HEADER + "P001,P002,Alice,Math,A - B,0.5,1 days\n")
+
+    def crash(rows):
+        raise RuntimeError
+
+    monkeypatch.setattr(feedback, "parse_correlation_rows", crash)
+    assert run_worker(feedback, path) == [("error", "RuntimeError", None)]
@@ -0,0 +1,54 @@
+import pytest
+
+
+@pytest.fixture
+def feedback(load_script):
+    return load_script("Source_FeedbackOneStuOneSub.py")
+
+
+@pytest.mark.parametrize("value, number", [("P004", 4), ("P4", 4), (" p12 ", 12), (7, 7)])
+def test_post_ids_are_p_numbers(feedback, value, number):
+    assert feedback.parse_post_id(value) == number
+
+
+@pytest.mark.parametrize("value", ["A12", "S1-P2", "abc", "", "P99999999999", -1])
+def test_other_post_ids_are_rejected(feedback, value):
+    with pytest.raises(ValueError):
+        feedback.parse_post_id(value)
+
+
+def correlation_record(**overrides):
+    record = {"Post1_ID": "P001", "Post2_ID": "P002", "Student": "Alice", "Subject": "Mathematics",
+              "Topics": "Algebra - Polynomials", "Correlation": "0.5", "Time_Gap": "2 days"}
+    record.update(overrides)
+    return record
+
+
+def test_normalize_row_converts_fields(feedback):
+    record = correlation_record(P_Value="")
+    record["Time Gap"] = record.pop("Time_Gap")
+    row = feedback.normalize_row(record)
+    assert row["Post1_ID"] == 1 and row["Correlation"] == 0.5 and row["Time_Gap"] == 2
+    assert row["P_Value"] == ""
+
+
+@pytest.mark.parametrize("record", [
+    correlation_record(Topics=None),
+    correlation_record(Correlation=None),
+    correlation_record(Correlation="high"),
+    correlation_record(Time_Gap="99999 days"),
+    correlation_record(Post2_ID="B12"),
+    [correlation_record()],
+])
+def test_normalize_row_rejects_records_it_cannot_store(feedback, record):
+    with pytest.raises(ValueError):
+        feedback.normalize_row(record)
+
+
+def test_bad_records_are_reported_with_their_number(feedback, tmp_path):
+    path = tmp_path / "rows.csv"
+    path.write_text("Post1_ID,Post2_ID,Student,Subject,Topics,Correlation,Time_Gap\n"
+                    "P001,P002,Alice,Math,A - B,0.5,1 days\n"
+                    "P001,P003,Alice,Math\n")
+    with pytest.raises(ValueError, match="record 2"):
+        list(feedback.iter_row_chunks(str(path)))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def feedback(load_script):
+    return load_script("Source_FeedbackOneStuOneSub.py")
+
+
+def moments(stats, group):
+    return stats.count[group], stats.mean[group], stats.m2[group]
+
+
+def test_remove_matches_statistics_of_remaining_rows(feedback):
+    rng = np.random.default_rng(0)
+    students = rng.integers(0, 3, 300)
+    subjects = rng.integers(0, 2, 300)
+    values = rng.random(300)
+
+    stats = feedback.RunningGroupStatistics()
+    for start in range(0, 300, 70):
+        stats.add(students[start:start + 70], subjects[start:start + 70], values[start:start + 70])
+    removed = rng.random(300) < 0.4
+    stats.remove(students[removed], subjects[removed], values[removed])
+
+    expected = feedback.RunningGroupStatistics()
+    expected.add(students[~removed], subjects[~removed], values[~removed])
+
+    assert len(stats) == len(expected)
+    for key, group in stats.group_index.items():
+        other = expected.group_index[key]
+        np.testing.assert_allclose(moments(stats, group), moments(expected, other), atol=1e-9)
+        np.testing.assert_array_equal(stats.histogram[group], expected.histogram[other])
+
+
+def test_removing_every_row_resets_the_group(feedback):
+    stats = feedback.RunningGroupStatistics()
+    stats.add([0, 0, 1], [0, 0, 0], [0.2, 0.6, 0.9])
+    stale_min, stale_max = stats.remove([0, 0], [0, 0], [0.6, 0.2])
+
+    assert moments(stats, 0) == (0, 0.0, 0.0)
+    assert stats.minimum[0] == np.inf and stats.maximum[0] == -np.inf
+    assert not stats.histogram[0].any()
+    # Emptied groups have no extremes to refresh
+    assert len(stale_min) == 0 and len(stale_max) == 0
+    assert moments(stats, 1) == (1, 0.9, 0.0)
+
+
+def test_remove_reports_groups_whose_extremes_were_removed(feedback):
+    stats = feedback.RunningGroupStatistics()
+    stats.add([0, 0, 0, 0, 1, 1, 1], [0] * 7, [0.1, 0.4, 0.5, 0.9, 0.3, 0.6, 0.7])
+
+    stale_min, stale_max = stats.remove([0, 1], [0, 0], [0.1, 0.6])
+    assert stale_min.tolist() == [0]
+    assert stale_max.tolist() == []
+
+    stats.set_extremes(stale_min, minimum=[0.4])
+    assert stats.minimum[0] == 0.4
+    assert stats.maximum[1] == 0.7
+
+    stale_min, stale_max = stats.remove([1], [0], [0.7])
+    assert stale_min.tolist() == [] and stale_max.tolist() == [1]
+
+
+def test_removing_one_of_two_equal_extremes_is_reported(feedback):
+    stats = feedback.RunningGroupStatistics()
+    stats.add([0, 0, 0], [0, 0, 0], [0.2, 0.2, 0.8])
+    stale_min, _ = stats.remove([0], [0], [0.2])
+    assert stale_min.tolist() == [0]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def memo(load_script):
+    return load_script("Source_Memo-Q-Algo.py")
+
+
+def keys_in_slot(table, slot, count):
+    """The first count keys that hash to the given slot"""
+    candidates = np.arange(100000, dtype=np.int64)
+    return candidates[table._slots(candidates) == slot][:count]
+
+
+def test_colliding_keys_get_separate_rows(memo):
+    table = memo.SparseQTable(capacity=4)
+    keys = keys_in_slot(table, 3, 3)
+    rows = table.rows(keys, insert=True)
+
+    assert sorted(rows.tolist()) == [1, 2, 3]
+    np.testing.assert_array_equal(table.row_keys[rows], keys)
+    # Linear probing placed them in consecutive slots
+    assert sorted(table.hash_keys[3:6].tolist()) == sorted(keys.tolist())
+    np.testing.assert_array_equal(table.rows(keys[::-1]), rows[::-1])
+
+
+def test_probing_wraps_around_the_end_of_the_hash_table(memo):
+    table = memo.SparseQTable(capacity=4)
+    last = len(table.hash_keys) - 1
+    keys = keys_in_slot(table, last, 2)
+    rows = table.rows(keys, insert=True)
+
+    assert table.hash_keys[last] in keys and table.hash_keys[0] in keys
+    np.testing.assert_array_equal(table.rows(keys), rows)
+
+
+def test_lookups_of_unvisited_keys_do_not_allocate(memo):
+    table = memo.SparseQTable(capacity=4)
+    keys = keys_in_slot(table, 2, 3)
+    table.rows(keys[:2], insert=True)
+
+    # keys[2] collides with both stored keys and then reaches an empty slot
+    assert table.rows(keys[2:]).tolist() == [0]
+    assert table.n_rows == 3
+    assert table.best(keys[2:])[1].tolist() == [0.0]
+
+
+def test_duplicate_keys_in_a_batch_share_one_row(memo):
+    table = memo.SparseQTable(capacity=4)
+    rows = table.rows(np.array([7, 7, 9, 7]), insert=True)
+    assert rows[0] == rows[1] == rows[3] != rows[2]
+    assert table.n_rows == 3
+
+
+def test_growth_and_rehash_keep_every_key_and_value(memo):
+    rng = np.random.default_rng(0)
+    table = memo.SparseQTable(capacity=2, alpha=1.0, gamma=0.0)
+    expected = {}
+    for _ in range(20):
+        states = rng.integers(0, 10 ** 9, 50)
+        actions = rng.integers(0, table.n_actions, 50)
+        rewards = rng.random(50)
+        table.update(states, actions, rewards, done=True)
+        # With alpha 1 and no bootstrapping a pair holds the mean of its rewards in the batch
+        for key in set(zip(states.tolist(), actions.tolist())):
+            batch = (states == key[0]) & (actions == key[1])
+            expected[key] = rewards[batch].mean()
+
+    keys = np.array(sorted({state for state, _ in expected}))
+    assert table.n_rows - 1 == len(keys)
+    assert 2 * table.n_rows <= len(table.hash_keys)
+    rows = table.rows(keys)
+    assert len(np.unique(rows)) == len(keys) and rows.min() >= 1
+    np.testing.assert_array_equal(table.row_keys[rows], keys)
+    for (state, action), value in expected.items():
+        assert table.q([state], [action])[0] == pytest.approx(value)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def feedback(load_script):
+    return load_script("Source_FeedbackOneStuOneSub.py")
+
+
+def clustered_texts(n, n_topics, seed):
+    """Posts mixing words from one of n_topics word lists with background words"""
+    rng = np.random.default_rng(seed)
+    topic_words = rng.integers(0, 2000, (n_topics, 40))
+    texts = []
+    for topic in rng.integers(0, n_topics, n):
+        words = np.concatenate([rng.choice(topic_words[topic], 15), rng.integers(0, 2000, 10)])
+        texts.append(" ".join(f"w{word}" for word in words))
+    return texts
+
+
+def test_default_options_reach_the_stated_recall(feedback):
+    vectors = feedback.PostVectors.fit(clustered_texts(1000, 20, seed=0))
+    result = feedback.measure_topk_recall(vectors, 50, sample_size=1000)
+    assert result["sample_size"] == 1000
+    assert result["recall"] >= 0.9
+
+
+def test_approximate_pairs_carry_exact_cosines(feedback):
+    vectors = feedback.PostVectors.fit(clustered_texts(300, 10, seed=1))
+    rows_a, rows_b, corr = feedback.approximate_top_pairs(vectors, 40)
+
+    assert len(corr) == 40 and np.all(np.diff(corr) <= 0)
+    keys = np.minimum(rows_a, rows_b) * len(vectors) + np.maximum(rows_a, rows_b)
+    assert len(np.unique(keys)) == 40 and np.all(rows_a != rows_b)
+    dense = vectors.dense(np.arange(len(vectors)))
+    np.testing.assert_allclose(corr, np.einsum("ij,ij->i", dense[rows_a], dense[rows_b]), atol=1e-5)